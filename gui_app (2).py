@@ -1,11 +1,126 @@
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QTableWidget, QTableWidgetItem, QTextEdit, QLabel, QSpinBox
+    QPushButton, QTableWidget, QTableWidgetItem, QPlainTextEdit, QLabel, QSpinBox, QProgressBar, QInputDialog
 )
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QFont
-from mlq_logic import run_scheduler
+from PyQt6.QtCore import Qt, QObject, QThread, pyqtSignal
+from PyQt6.QtGui import QFont, QColor, QTextCharFormat, QTextCursor
+from mlq_logic import iter_events
+from mlq_events import COMPLETION, Event, EventFormatter, Timeline, TRACE_TICKS, draw_gantt
+from mlq_cache import ResultCache, result_key
+from mlq_stats import ProcessStats
+from mlq_generate import generate
 import matplotlib.pyplot as plt
+import threading
+import time
+from collections import deque
+
+# Log lines kept in the output view; older lines are dropped as new ones arrive
+LOG_LINE_LIMIT = 20000
+# The worker hands lines to the UI at most this often, or sooner once this many are pending,
+# and never while the UI is still inserting the previous batch
+BATCH_INTERVAL = 0.05
+BATCH_LINES = 2000
+
+
+class SimulationWorker(QObject):
+    """Runs one simulation off the UI thread and streams its log in batches.
+
+    Lives on a QThread: ``run`` formats events into log lines and emits them
+    every BATCH_INTERVAL seconds, along with the number of completed
+    processes.  The next batch is only sent once the UI has called
+    ``batch_shown``; meanwhile lines keep accumulating, but only the last
+    LOG_LINE_LIMIT of them (all the view would keep anyway), so a UI that
+    falls behind neither queues signals nor inserts lines it then drops.
+    ``cancel`` may be called from the UI thread; the run stops
+    at the next event.  A result already in ``cache`` is reported straight
+    away, without replaying the event log; completed runs are added to it.
+    """
+
+    batch = pyqtSignal(list)             # formatted log lines
+    progress = pyqtSignal(int)           # processes completed so far
+    finished = pyqtSignal(object, object)  # stats, Timeline
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+    done = pyqtSignal()                  # always last, whatever the outcome
+
+    def __init__(self, processes, quantum, aging_threshold, demotion_threshold, preemptive_sjf, cache=None):
+        super().__init__()
+        self.processes = processes
+        self.params = (quantum, aging_threshold, demotion_threshold, preemptive_sjf)
+        self.cache = cache
+        self.cancel_requested = False
+        # Set while the UI is ready for another batch
+        self.ui_ready = threading.Event()
+        self.ui_ready.set()
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def batch_shown(self):
+        """Called from the UI thread once a batch has been appended"""
+        self.ui_ready.set()
+
+    def emit_batch(self, lines):
+        self.ui_ready.clear()
+        self.batch.emit(list(lines))
+        lines.clear()
+
+    def run(self):
+        quantum, aging_threshold, demotion_threshold, preemptive_sjf = self.params
+        formatter = EventFormatter(preemptive_sjf, demotion_threshold)
+        timeline = Timeline()
+        stats = None
+        lines = deque(maxlen=LOG_LINE_LIMIT)
+        completed = 0
+        last_flush = time.monotonic()
+
+        try:
+            key = None
+            if self.cache is not None:
+                key = result_key(self.processes, *self.params)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    stats, timeline = cached
+                    priorities = {p["id"]: p["priority"] for p in self.processes}
+                    self.batch.emit(["Same table and parameters as an earlier run: "
+                                     "showing the cached result (event log not replayed)."])
+                    self.progress.emit(sum(s["completion_time"] is not None for s in stats.values()))
+                    self.finished.emit(ProcessStats.from_dict(stats, priorities), timeline)
+                    return
+
+            for event in iter_events(self.processes, quantum, aging_threshold, demotion_threshold, preemptive_sjf,
+                                     trace=TRACE_TICKS, stats_format="columns"):
+                if self.cancel_requested:
+                    break
+                # Check if this is the statistics tuple
+                if not isinstance(event, Event):
+                    stats = event[1]
+                    continue
+
+                lines.extend(formatter.format(event))
+                timeline.feed(event)
+                if event.kind == COMPLETION:
+                    completed += 1
+
+                now = time.monotonic()
+                if (len(lines) >= BATCH_LINES or now - last_flush >= BATCH_INTERVAL) and self.ui_ready.is_set():
+                    self.emit_batch(lines)
+                    self.progress.emit(completed)
+                    last_flush = now
+
+            if lines:
+                self.emit_batch(lines)
+            self.progress.emit(completed)
+            if self.cancel_requested:
+                self.cancelled.emit()
+            else:
+                if self.cache is not None:
+                    self.cache.put(key, stats.as_dict(), timeline)
+                self.finished.emit(stats, timeline)
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            self.done.emit()
 
 
 class SchedulerGUI(QWidget):
@@ -73,20 +188,43 @@ class SchedulerGUI(QWidget):
         self.reset_button.clicked.connect(self.reset_to_default)
         button_layout.addWidget(self.reset_button)
 
+        self.generate_button = QPushButton("Generate Workload")
+        self.generate_button.clicked.connect(self.generate_workload)
+        button_layout.addWidget(self.generate_button)
+
         self.run_button = QPushButton("Run Simulation")
         self.run_button.clicked.connect(self.run_simulation)
         button_layout.addWidget(self.run_button)
 
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_simulation)
+        self.cancel_button.setEnabled(False)
+        button_layout.addWidget(self.cancel_button)
+
         layout.addLayout(button_layout)
 
-        # Output box
+        self.progress = QProgressBar()
+        self.progress.setFormat("%v / %m processes completed")
+        self.progress.setValue(0)
+        layout.addWidget(self.progress)
+
+        # Output box: a plain-text view appends a whole batch in one edit, and
+        # the block limit keeps long runs from growing the document without bound
         layout.addWidget(QLabel("Simulation Output:"))
-        self.output = QTextEdit()
+        self.output = QPlainTextEdit()
         self.output.setReadOnly(True)
+        self.output.setMaximumBlockCount(LOG_LINE_LIMIT)
         layout.addWidget(self.output)
 
         self.setLayout(layout)
 
+        self.formats = self.build_line_formats()
+        # Re-running a table and parameter set seen before shows its result at once
+        self.result_cache = ResultCache(max_entries=32)
+        self.worker = None
+        self.worker_thread = None
+        self.timeline = Timeline()
+
         # Load defaults at startup
         self.reset_to_default()
 
@@ -114,6 +252,17 @@ class SchedulerGUI(QWidget):
 
         self.output.clear()
 
+    def generate_workload(self):
+        """Replace the table with a random workload (Poisson arrivals, exponential bursts, about 80% load)"""
+        count, ok = QInputDialog.getInt(self, "Generate Workload", "Number of processes:", 20, 1, 10000)
+        if not ok:
+            return
+        self.table.setUpdatesEnabled(False)
+        self.table.setRowCount(0)
+        for p in generate(count, rate=0.2, mean_burst=4).iter_processes():
+            self.add_process(p["arrival"], p["burst"], p["priority"])
+        self.table.setUpdatesEnabled(True)
+
     def add_process(self, arrival=0, burst=1, priority=1):
         row = self.table.rowCount()
         self.table.insertRow(row)
@@ -141,79 +290,125 @@ class SchedulerGUI(QWidget):
         return processes
 
     def run_simulation(self):
+        if self.worker_thread is not None:
+            return
+
         self.output.clear()
-        self.output.append("<b><font color='blue'>Simulation started...</font></b><br>")
-        self.gantt_data = []
+        self.output.appendHtml("<b><font color='blue'>Simulation started...</font></b><br>")
+        self.timeline = Timeline()
 
-        processes = self.get_processes_from_table()
+        try:
+            processes = self.get_processes_from_table()
+        except (AttributeError, ValueError) as e:
+            self.output.appendHtml(f"<b><font color='red'>[ERROR]</font></b> Invalid process table: {e}")
+            return
         quantum = self.quantum_input.value()
         aging_threshold = self.aging_input.value()
         demotion_threshold = self.demotion_input.value()
-
-        stats = None
-
-        try:
-            for step in run_scheduler(processes, quantum, aging_threshold, demotion_threshold):
-                # Check if this is the statistics tuple
-                if isinstance(step, tuple) and step[0] == "STATS":
-                    stats = step[1]
-                    continue
-                
-                self.output.append(self.colorize(step))
-                
-                if step.startswith("TIME") and "RUN" in step:
-                    parts = step.split()
-                    time = int(parts[1].replace(":", ""))
-                    pid = parts[3]
-                    self.gantt_data.append((time, pid))
-
-            if stats:
-                self.show_gantt_chart()
-                self.show_statistics(stats)
-
-        except Exception as e:
-            self.output.append(f"<b><font color='red'>[ERROR]</font></b> {e}")
-
-    def colorize(self, text: str) -> str:
+        preemptive_sjf = self.preemptive_sjf_checkbox.isChecked()
+
+        self.progress.setRange(0, len(processes))
+        self.progress.setValue(0)
+        self.run_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+
+        self.worker = SimulationWorker(processes, quantum, aging_threshold, demotion_threshold, preemptive_sjf,
+                                       self.result_cache)
+        self.worker_thread = QThread(self)
+        self.worker.moveToThread(self.worker_thread)
+        self.worker_thread.started.connect(self.worker.run)
+        self.worker.batch.connect(self.append_lines)
+        self.worker.progress.connect(self.progress.setValue)
+        self.worker.finished.connect(self.simulation_finished)
+        self.worker.cancelled.connect(self.simulation_cancelled)
+        self.worker.failed.connect(self.simulation_failed)
+        self.worker.done.connect(self.worker_thread.quit)
+        self.worker_thread.finished.connect(self.worker.deleteLater)
+        self.worker_thread.finished.connect(self.worker_stopped)
+        self.worker_thread.start()
+
+    def cancel_simulation(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.cancel_button.setEnabled(False)
+
+    def worker_stopped(self):
+        self.worker_thread.deleteLater()
+        self.worker = None
+        self.worker_thread = None
+        self.run_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+
+    def simulation_finished(self, stats, timeline):
+        self.timeline = timeline
+        if stats:
+            self.show_gantt_chart()
+            self.show_statistics(stats)
+
+    def simulation_cancelled(self):
+        self.output.appendHtml("<b><font color='red'>Simulation cancelled.</font></b>")
+
+    def simulation_failed(self, message):
+        self.output.appendHtml(f"<b><font color='red'>[ERROR]</font></b> {message}")
+
+    def closeEvent(self, event):
+        if self.worker_thread is not None:
+            # quit() directly: the worker's done signal is queued to this (now blocked) thread
+            self.worker.cancel()
+            self.worker_thread.quit()
+            self.worker_thread.wait()
+        super().closeEvent(event)
+
+    def append_lines(self, lines):
+        """Append a batch of log lines in one edit, colored by line_format"""
+        cursor = QTextCursor(self.output.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        for line in lines:
+            cursor.insertBlock()
+            cursor.insertText(line, self.line_format(line))
+        cursor.endEditBlock()
+        self.output.verticalScrollBar().setValue(self.output.verticalScrollBar().maximum())
+        if self.worker is not None:
+            self.worker.batch_shown()
+
+    @staticmethod
+    def build_line_formats():
+        formats = {}
+        for name, color, bold in (("completed", "green", True), ("demotion", "orange", True),
+                                  ("aging", "blue", True), ("idle", "gray", False), ("plain", "black", False)):
+            fmt = QTextCharFormat()
+            fmt.setForeground(QColor(color))
+            if bold:
+                fmt.setFontWeight(QFont.Weight.Bold)
+            formats[name] = fmt
+        return formats
+
+    def line_format(self, text: str) -> QTextCharFormat:
         if "completed" in text:
-            return f"<font color='green'><b>{text}</b></font>"
+            return self.formats["completed"]
         elif "DEMOTION" in text:
-            return f"<font color='orange'><b>{text}</b></font>"
+            return self.formats["demotion"]
         elif "AGING" in text:
-            return f"<font color='blue'><b>{text}</b></font>"
-        elif "IDLE" in text.lower():
-            return f"<font color='gray'>{text}</font>"
+            return self.formats["aging"]
+        elif "IDLE" in text:
+            return self.formats["idle"]
         else:
-            return text
+            return self.formats["plain"]
 
     def show_gantt_chart(self):
-        if not self.gantt_data:
+        if not len(self.timeline):
             return
 
         fig, ax = plt.subplots(figsize=(10, 4))
-        colors = {}
-        for t, pid in self.gantt_data:
-            if pid not in colors:
-                colors[pid] = plt.cm.tab10(len(colors) % 10)
-            ax.barh(y=pid, width=1, left=t, color=colors[pid], edgecolor="black", linewidth=0.5)
-
-        ax.set_xlabel("Time", fontsize=12)
-        ax.set_ylabel("Process", fontsize=12)
-        ax.set_title("Gantt Chart - Process Execution Timeline", fontsize=14, fontweight='bold')
-        ax.set_yticks([p for p in sorted(set(pid for _, pid in self.gantt_data))])
-        ax.grid(axis='x', alpha=0.3, linestyle='--')
-        
-        min_time = min(t for t, _ in self.gantt_data)
-        max_time = max(t for t, _ in self.gantt_data)
-        ax.set_xlim(min_time - 0.5, max_time + 0.5)
-        
+        draw_gantt(self.timeline, ax)
         plt.tight_layout()
         plt.show()
 
     def show_statistics(self, stats):
-        self.output.append("<br><b><font color='purple'>╔════════════════════════════════════════════════════════════╗</font></b>")
-        self.output.append("<b><font color='purple'>║          PROCESS SCHEDULING STATISTICS                     ║</font></b>")
-        self.output.append("<b><font color='purple'>╚════════════════════════════════════════════════════════════╝</font></b><br>")
+        self.output.appendHtml("<br><b><font color='purple'>╔════════════════════════════════════════════════════════════╗</font></b>")
+        self.output.appendHtml("<b><font color='purple'>║          PROCESS SCHEDULING STATISTICS                     ║</font></b>")
+        self.output.appendHtml("<b><font color='purple'>╚════════════════════════════════════════════════════════════╝</font></b><br>")
         
         # Create a formatted table header
         header = (
@@ -221,13 +416,8 @@ class SchedulerGUI(QWidget):
             f"{'Process':<10} {'AT':<6} {'BT':<6} {'CT':<6} {'TAT':<6} {'WT':<6} {'RT':<6}"
             "</font></b>"
         )
-        self.output.append(header)
-        self.output.append("<font color='gray'>─────────────────────────────────────────────────────────</font>")
-        
-        total_tat = 0
-        total_wt = 0
-        total_rt = 0
-        process_count = 0
+        self.output.appendHtml(header)
+        self.output.appendHtml("<font color='gray'>─────────────────────────────────────────────────────────</font>")
         
         for pid in sorted(stats.keys()):
             s = stats[pid]
@@ -238,14 +428,9 @@ class SchedulerGUI(QWidget):
             at = s["arrival_time"]
             bt = s["burst_time"]
             ct = s["completion_time"]
-            rt = s["first_response_time"] - at if s["first_response_time"] is not None else 0
-            tat = ct - at
-            wt = s["total_waiting_time"]
-            
-            total_tat += tat
-            total_wt += wt
-            total_rt += rt
-            process_count += 1
+            tat = s["turnaround_time"]
+            wt = s["waiting_time"]
+            rt = s["response_time"]
             
             row = (
                 f"<font color='darkgreen'>{pid:<10}</font> "
@@ -254,25 +439,28 @@ class SchedulerGUI(QWidget):
                 f"<font color='brown'>{wt:<6}</font> "
                 f"<font color='navy'>{rt:<6}</font>"
             )
-            self.output.append(row)
+            self.output.appendHtml(row)
         
         # Add separator
-        self.output.append("<font color='gray'>─────────────────────────────────────────────────────────</font>")
+        self.output.appendHtml("<font color='gray'>─────────────────────────────────────────────────────────</font>")
         
-        # Calculate averages
-        if process_count > 0:
-            avg_tat = total_tat / process_count
-            avg_wt = total_wt / process_count
-            avg_rt = total_rt / process_count
+        # Averages and percentiles come from the vectorized summary
+        summary = stats.summary()
+        if summary["count"] > 0:
+            avg_tat, avg_wt, avg_rt = stats.averages()
             
-            self.output.append("<br><b><font color='purple'>AVERAGE TIMES:</font></b>")
-            self.output.append(f"<font color='teal'>• Average Turnaround Time (TAT): {avg_tat:.2f}</font>")
-            self.output.append(f"<font color='brown'>• Average Waiting Time (WT):     {avg_wt:.2f}</font>")
-            self.output.append(f"<font color='navy'>• Average Response Time (RT):    {avg_rt:.2f}</font>")
+            self.output.appendHtml("<br><b><font color='purple'>AVERAGE TIMES:</font></b>")
+            self.output.appendHtml(f"<font color='teal'>• Average Turnaround Time (TAT): {avg_tat:.2f}</font>")
+            self.output.appendHtml(f"<font color='brown'>• Average Waiting Time (WT):     {avg_wt:.2f}</font>")
+            self.output.appendHtml(f"<font color='navy'>• Average Response Time (RT):    {avg_rt:.2f}</font>")
+            self.output.appendHtml(
+                f"<font color='gray'>• p95 TAT / WT / RT: {summary['turnaround_time']['p95']:.2f} / "
+                f"{summary['waiting_time']['p95']:.2f} / {summary['response_time']['p95']:.2f}</font>"
+            )
         
-        self.output.append("<br><b><font color='gray'>Legend:</font></b>")
-        self.output.append("<font color='gray'>AT = Arrival Time | BT = Burst Time | CT = Completion Time</font>")
-        self.output.append("<font color='gray'>TAT = Turnaround Time | WT = Waiting Time | RT = Response Time</font>")
+        self.output.appendHtml("<br><b><font color='gray'>Legend:</font></b>")
+        self.output.appendHtml("<font color='gray'>AT = Arrival Time | BT = Burst Time | CT = Completion Time</font>")
+        self.output.appendHtml("<font color='gray'>TAT = Turnaround Time | WT = Waiting Time | RT = Response Time</font>")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,169 @@
+"""Headless command-line runner: ``python -m mlq workload.csv [options]``.
+
+Loads a workload (CSV, JSONL, JSON list or ``.npy`` cache, see
+``mlq_workload``), runs the scheduler and prints per-process statistics as
+a table, CSV or JSON.  Only the scheduler modules are imported, so a run
+starts in a few tens of milliseconds; matplotlib is loaded only for
+``--plot``.
+
+    python -m mlq jobs.csv --quantum 4 --format csv
+    python -m mlq jobs.jsonl --stream --summary-only --format json
+    python -m mlq jobs.csv --log --plot gantt.png
+"""
+import argparse
+import sys
+
+from mlq_events import Event, EventFormatter, Timeline, TRACE_NONE, TRACE_TICKS, TRACE_TRANSITIONS, draw_gantt
+from mlq_logic import ENGINES, iter_events
+from mlq_sweep import parse_bool
+
+COLUMNS = ("pid", "arrival_time", "burst_time", "completion_time", "turnaround_time", "waiting_time",
+           "response_time")
+HEADINGS = ("Process", "AT", "BT", "CT", "TAT", "WT", "RT")
+
+
+def averages(stats):
+    """Average (TAT, WT, RT) over completed processes, without NumPy"""
+    total_tat = total_wt = total_rt = count = 0
+    for s in stats.values():
+        if s["completion_time"] is None:
+            continue
+        total_tat += s["turnaround_time"]
+        total_wt += s["waiting_time"]
+        total_rt += s["response_time"]
+        count += 1
+    if not count:
+        return count, (0.0, 0.0, 0.0)
+    return count, (total_tat / count, total_wt / count, total_rt / count)
+
+
+def rows(stats):
+    for pid, s in stats.items():
+        if s["completion_time"] is not None:
+            yield [pid] + [s[name] for name in COLUMNS[1:]]
+
+
+def print_table(stats, summary_only, out):
+    if not summary_only:
+        print(" ".join(f"{heading:<10}" if i == 0 else f"{heading:>8}" for i, heading in enumerate(HEADINGS)),
+              file=out)
+        for row in rows(stats):
+            print(f"{str(row[0]):<10} " + " ".join(f"{value:>8}" for value in row[1:]), file=out)
+    count, (avg_tat, avg_wt, avg_rt) = averages(stats)
+    print(f"Completed {count} of {len(stats)} processes | Avg TAT {avg_tat:.2f} | "
+          f"Avg WT {avg_wt:.2f} | Avg RT {avg_rt:.2f}", file=out)
+
+
+def print_csv(stats, summary_only, out):
+    import csv
+
+    writer = csv.writer(out, lineterminator="\n")
+    if summary_only:
+        count, values = averages(stats)
+        writer.writerow(["completed", "avg_tat", "avg_wt", "avg_rt"])
+        writer.writerow([count] + [f"{value:.4f}" for value in values])
+        return
+    writer.writerow(COLUMNS)
+    writer.writerows(rows(stats))
+
+
+def print_json(stats, summary_only, out):
+    import json
+
+    count, (avg_tat, avg_wt, avg_rt) = averages(stats)
+    result = {"completed": count, "avg_tat": avg_tat, "avg_wt": avg_wt, "avg_rt": avg_rt}
+    if not summary_only:
+        result["processes"] = [dict(zip(COLUMNS, row)) for row in rows(stats)]
+    json.dump(result, out, indent=2)
+    print(file=out)
+
+
+FORMATTERS = {"table": print_table, "csv": print_csv, "json": print_json}
+
+
+def plot_gantt(timeline, path):
+    """Save the timeline as a Gantt chart image (imports matplotlib)"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 4))
+    draw_gantt(timeline, ax)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m mlq", description="Run the MLFQ scheduler on a workload file.")
+    parser.add_argument("workload", help="CSV, JSONL, JSON list or .npy cache of {id, arrival, burst, priority}")
+    parser.add_argument("--quantum", type=int, default=3)
+    parser.add_argument("--aging-threshold", type=int, default=5)
+    parser.add_argument("--demotion-threshold", type=int, default=6)
+    parser.add_argument("--preemptive-sjf", type=parse_bool, default=True, metavar="BOOL")
+    parser.add_argument("--engine", choices=ENGINES, default="event")
+    parser.add_argument("--format", choices=sorted(FORMATTERS), default="table")
+    parser.add_argument("--summary-only", action="store_true", help="print only the averages")
+    parser.add_argument("--stream", action="store_true",
+                        help="stream an arrival-sorted trace instead of loading it (stats in arrival order)")
+    parser.add_argument("--log", action="store_true", help="print the event log to stderr")
+    parser.add_argument("--plot", metavar="FILE", help="save a Gantt chart (needs matplotlib)")
+    parser.add_argument("--profile", action="store_true", help="print a phase profile to stderr")
+    args = parser.parse_args(argv)
+
+    if args.plot:
+        try:
+            import matplotlib  # noqa: F401  (checked up front rather than after a long run)
+        except ImportError:
+            print("error: --plot needs matplotlib (pip install matplotlib)", file=sys.stderr)
+            return 2
+
+    from mlq_workload import open_trace, read_trace
+
+    try:
+        if args.stream or args.workload.endswith(".npy"):
+            processes = open_trace(args.workload)
+        else:
+            processes = list(read_trace(args.workload, require_sorted=False))
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    profiler = None
+    if args.profile:
+        from mlq_profile import Profiler
+        profiler = Profiler()
+
+    trace = TRACE_TICKS if args.log else TRACE_TRANSITIONS if args.plot else TRACE_NONE
+    formatter = EventFormatter(args.preemptive_sjf, args.demotion_threshold)
+    timeline = Timeline()
+    stats = None
+    try:
+        for event in iter_events(processes, args.quantum, args.aging_threshold, args.demotion_threshold,
+                                 args.preemptive_sjf, engine=args.engine, trace=trace, profiler=profiler):
+            if not isinstance(event, Event):
+                stats = event[1]
+            else:
+                if args.log:
+                    for line in formatter.format(event):
+                        print(line, file=sys.stderr)
+                timeline.feed(event)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    FORMATTERS[args.format](stats, args.summary_only, sys.stdout)
+    if args.plot:
+        plot_gantt(timeline, args.plot)
+    if profiler is not None:
+        profiler.dump(sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # Output piped into e.g. `head`: stop quietly
+        sys.stderr.close()
+        sys.exit(0)
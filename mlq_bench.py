@@ -0,0 +1,439 @@
+"""Benchmarks for the scheduler core in mlq_logic.
+
+Run ``python mlq_bench.py`` for the quick per-tick and per-arrival numbers,
+or the full suite, which writes JSON results that can be compared between
+commits:
+
+    python mlq_bench.py --suite --output before.json
+    python mlq_bench.py --suite --output after.json --compare before.json
+
+The suite runs fixed synthetic workloads at several scales and parameter
+settings in every mode (engine and stats format), and first checks that
+each mode reproduces the tick engine's stats.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from mlq_events import Event, RUN, TRACE_NONE, TRACE_TICKS, TRACE_TRANSITIONS
+from mlq_logic import ENGINES, ArrivalCursor, iter_events
+
+
+def make_backlog(n):
+    """n CPU-bound processes that all arrive at time 0, spread over the four queues"""
+    return [
+        {"id": f"P{i+1}", "arrival": 0, "burst": 50 + (i * 7919) % 200, "priority": i % 4 + 1}
+        for i in range(n)
+    ]
+
+
+def make_trace(n):
+    """n short processes arriving steadily, so only a handful are live at a time"""
+    return [
+        {"id": f"P{i+1}", "arrival": 4 * i, "burst": 1 + (i * 7919) % 6, "priority": i % 4 + 1}
+        for i in range(n)
+    ]
+
+
+def time_per_tick(processes, engine, ticks=2000, **params):
+    """Average wall time (seconds) per simulated tick over `ticks` RUN ticks.
+
+    Timing starts after the first RUN event so the one-off setup and the
+    initial burst of arrivals are not counted.
+    """
+    events = iter_events(processes, engine=engine, trace=TRACE_TICKS, **params)
+    ran = 0
+    start = None
+    for event in events:
+        if event[0] == RUN:
+            if start is None:
+                start = time.perf_counter()
+                continue
+            ran += 1
+            if ran == ticks:
+                break
+    return (time.perf_counter() - start) / max(ran, 1)
+
+
+def bench_scaling(sizes=(100, 1000, 10000), engines=ENGINES, ticks=2000):
+    """Print per-tick cost as the number of live processes grows.
+
+    Aging is pushed out of the measured window so the numbers reflect queue
+    bookkeeping rather than the promotions themselves.
+    """
+    print(f"{'Processes':>10} " + " ".join(f"{engine + ' us/tick':>16}" for engine in engines))
+    for n in sizes:
+        processes = make_backlog(n)
+        cells = []
+        for engine in engines:
+            per_tick = time_per_tick(processes, engine, ticks=ticks, aging_threshold=10**6)
+            cells.append(f"{per_tick * 1e6:>16.2f}")
+        print(f"{n:>10} " + " ".join(cells))
+
+
+def bench_arrivals(sizes=(1000, 10000, 100000), engines=ENGINES, trace=TRACE_TRANSITIONS):
+    """Print full-run cost per process for long traces with few live processes.
+
+    Per-process cost stays flat when arrivals are handed out by a cursor
+    instead of scanning the whole workload on every tick.
+    """
+    print(f"{'Processes':>10} " + " ".join(f"{engine + ' us/proc':>16}" for engine in engines))
+    for n in sizes:
+        processes = make_trace(n)
+        cells = []
+        for engine in engines:
+            start = time.perf_counter()
+            for _ in iter_events(processes, engine=engine, trace=trace):
+                pass
+            cells.append(f"{(time.perf_counter() - start) / n * 1e6:>16.2f}")
+        print(f"{n:>10} " + " ".join(cells))
+
+
+# python -m mlq on a tiny workload should start in tens of milliseconds
+STARTUP_BUDGET = 0.1
+STARTUP_WORKLOAD = "id,arrival,burst,priority\nP1,0,5,1\nP2,1,3,2\nP3,2,8,3\n"
+
+
+def bench_startup(runs=10):
+    """Wall time of ``python -m mlq`` on a three-process workload, and of a bare interpreter.
+
+    Each is the fastest of `runs` subprocess launches after a warm-up
+    launch, with bytecode caching on so the numbers match a normal
+    install.  Returns ``{"interpreter": seconds, "mlq": seconds}``.
+    """
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    here = os.path.dirname(os.path.abspath(__file__))
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "startup.csv")
+        with open(path, "w") as f:
+            f.write(STARTUP_WORKLOAD)
+        commands = {"interpreter": [sys.executable, "-c", "pass"], "mlq": [sys.executable, "-m", "mlq", path]}
+        for name, command in commands.items():
+            best = None
+            for run in range(runs + 1):
+                start = time.perf_counter()
+                subprocess.run(command, cwd=here, env=env, check=True, stdout=subprocess.DEVNULL)
+                elapsed = time.perf_counter() - start
+                if run and (best is None or elapsed < best):
+                    best = elapsed
+            timings[name] = best
+    return timings
+
+
+def _format_startup(startup):
+    line = (f"Startup: python -m mlq {startup['mlq'] * 1e3:.1f} ms "
+            f"(interpreter alone {startup['interpreter'] * 1e3:.1f} ms)")
+    if startup["mlq"] > STARTUP_BUDGET:
+        line += f", over the {STARTUP_BUDGET * 1e3:.0f} ms budget"
+    return line
+
+
+# ---- benchmark suite ----
+
+SCALES = (10, 1_000, 100_000, 1_000_000)
+QUICK_SCALES = (10, 1_000)
+# (engine, stats_format) pairs; the tick engine is the reference
+MODES = (("tick", "dict"), ("event", "dict"), ("compact", "dict"), ("compact", "columns"))
+# The tick engine visits every simulated time unit, so it only runs up to this size
+TICK_MAX_PROCESSES = 10_000
+# Workloads up to this size are checked against the tick engine before timing
+CHECK_MAX_PROCESSES = 2_000
+PARAM_SETS = {
+    "default": {"quantum": 3, "aging_threshold": 5, "demotion_threshold": 6},
+    "short_quantum": {"quantum": 1, "aging_threshold": 5, "demotion_threshold": 2},
+    "slow_aging": {"quantum": 4, "aging_threshold": 50, "demotion_threshold": 8},
+}
+# Timings more than this much slower than the compared run count as regressions
+REGRESSION_TOLERANCE = 0.10
+# Each case runs REPEATS times (fewer once MAX_TOTAL_TIME seconds have passed, more until
+# MIN_TOTAL_TIME has), and the fastest run is reported
+REPEATS = 5
+MIN_TOTAL_TIME = 0.2
+MAX_TOTAL_TIME = 5.0
+# Passes over the whole suite; each case reports its fastest pass
+ROUNDS = 3
+# Cases faster than this (in both runs) are too noisy for the time comparison
+TIME_FLOOR = 0.05
+
+
+def interactive_workload(n, seed=0):
+    """Short bursts in the upper queues, arriving about every 3 time units"""
+    rng = random.Random(seed)
+    arrival = 0
+    for i in range(n):
+        arrival += rng.randint(0, 6)
+        yield {"id": f"P{i+1}", "arrival": arrival, "burst": rng.randint(1, 4), "priority": rng.choice((1, 1, 2, 3))}
+
+
+def cpu_bound_workload(n, seed=0):
+    """Long bursts in the round-robin queues, about 80% CPU load"""
+    rng = random.Random(seed)
+    arrival = 0
+    for i in range(n):
+        arrival += rng.randint(0, 100)
+        yield {"id": f"P{i+1}", "arrival": arrival, "burst": rng.randint(20, 60), "priority": rng.choice((3, 4))}
+
+
+def sjf_workload(n, seed=0):
+    """Clumps of Q2 jobs with mixed bursts near full load, so SJF ordering and preemption do the work"""
+    rng = random.Random(seed)
+    arrival = 0
+    for i in range(n):
+        if rng.random() < 0.5:
+            arrival += rng.randint(1, 38)
+        burst = rng.randint(1, 4) if rng.random() < 0.6 else rng.randint(10, 30)
+        yield {"id": f"P{i+1}", "arrival": arrival, "burst": burst, "priority": 2}
+
+
+WORKLOADS = {
+    "interactive": interactive_workload,
+    "cpu_bound": cpu_bound_workload,
+    "sjf_contention": sjf_workload,
+}
+
+
+def _stats_of(processes, engine, stats_format, params):
+    *_, (_, stats) = iter_events(processes, engine=engine, trace=TRACE_NONE, stats_format=stats_format, **params)
+    return stats.as_dict() if stats_format == "columns" else stats
+
+
+def check_modes(workloads=WORKLOADS, scales=QUICK_SCALES, modes=MODES, param_sets=PARAM_SETS):
+    """Compare every mode's final stats with the tick engine's.
+
+    Returns a list of ``(workload, n, param_set, engine, stats_format)``
+    tuples that disagree; scales above CHECK_MAX_PROCESSES are skipped.
+    """
+    mismatches = []
+    for name, make in workloads.items():
+        for n in scales:
+            if n > CHECK_MAX_PROCESSES:
+                continue
+            processes = list(make(n))
+            for set_name, params in param_sets.items():
+                reference = _stats_of(processes, "tick", "dict", params)
+                for engine, stats_format in modes:
+                    if (engine, stats_format) == ("tick", "dict"):
+                        continue
+                    if _stats_of(processes, engine, stats_format, params) != reference:
+                        mismatches.append((name, n, set_name, engine, stats_format))
+    return mismatches
+
+
+def _timed_run(make, n, engine, stats_format, params):
+    events = 0
+    start = time.perf_counter()
+    for event in iter_events(ArrivalCursor(make(n), presorted=True), engine=engine, trace=TRACE_TRANSITIONS,
+                             stats_format=stats_format, **params):
+        if isinstance(event, Event):
+            events += 1
+        else:
+            stats = event[1]
+    return time.perf_counter() - start, events, stats
+
+
+def run_case(make, n, engine, stats_format, params, memory=True, repeats=REPEATS):
+    """Time full runs at TRACE_TRANSITIONS and return the measurements.
+
+    The case is repeated (see REPEATS and MIN_TOTAL_TIME) and the fastest
+    run is reported, which filters out most scheduling and GC noise.  The
+    workload is generated lazily in arrival order, so neither the timing
+    nor the memory figure includes a process list.  Peak memory comes from
+    a separate run under tracemalloc, which slows Python down.
+    """
+    times = []
+    while len(times) < repeats and sum(times) < MAX_TOTAL_TIME or sum(times) < MIN_TOTAL_TIME:
+        stats = None
+        wall_time, events, stats = _timed_run(make, n, engine, stats_format, params)
+        times.append(wall_time)
+    wall_time = min(times)
+
+    sim_time = 0
+    if stats_format == "columns":
+        if len(stats):
+            sim_time = int(stats.columns["completion_time"].max())
+    else:
+        sim_time = max((s["completion_time"] for s in stats.values()), default=0)
+    del stats
+
+    peak_memory = None
+    if memory:
+        tracemalloc.start()
+        *_, (_, stats) = iter_events(ArrivalCursor(make(n), presorted=True), engine=engine, trace=TRACE_NONE,
+                                     stats_format=stats_format, **params)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del stats
+
+    return {
+        "wall_time": wall_time,
+        "repeats": len(times),
+        "events": events,
+        "events_per_sec": events / wall_time if wall_time else None,
+        "sim_time": sim_time,
+        "sim_units_per_sec": sim_time / wall_time if wall_time else None,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(workloads=WORKLOADS, scales=SCALES, modes=MODES, param_sets=PARAM_SETS, memory=True, log=print,
+              repeats=REPEATS, rounds=ROUNDS):
+    """Run every (workload, scale, parameter set, mode) plus the startup check and return the JSON-ready report.
+
+    The whole suite is timed `rounds` times and each case keeps its fastest
+    round, so a stretch of slow machine time hits one round of a case
+    rather than all of its runs.  Peak memory is measured in the first round.
+    """
+    cases = []
+    for name, make in workloads.items():
+        for n in scales:
+            for set_name, params in param_sets.items():
+                for engine, stats_format in modes:
+                    if engine == "tick" and n > TICK_MAX_PROCESSES:
+                        continue
+                    cases.append((name, make, n, set_name, params, engine, stats_format))
+
+    results = []
+    for round_num in range(rounds):
+        if log and rounds > 1:
+            log(f"Timing round {round_num + 1} of {rounds}")
+        for index, (name, make, n, set_name, params, engine, stats_format) in enumerate(cases):
+            measured = run_case(make, n, engine, stats_format, params, memory and not round_num, repeats)
+            if not round_num:
+                results.append({"workload": name, "processes": n, "params": set_name, "engine": engine,
+                                "stats_format": stats_format, **measured})
+            else:
+                result = results[index]
+                repeats_so_far = result["repeats"] + measured["repeats"]
+                if measured["wall_time"] < result["wall_time"]:
+                    result.update({key: value for key, value in measured.items() if key != "peak_memory_bytes"})
+                result["repeats"] = repeats_so_far
+            if log and round_num == rounds - 1:
+                log(_format_result(results[index]))
+    startup = bench_startup()
+    if log:
+        log(_format_startup(startup))
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "param_sets": param_sets,
+        },
+        "startup": startup,
+        "results": results,
+    }
+
+
+def _case_key(result):
+    return (result["workload"], result["processes"], result["params"], result["engine"], result["stats_format"])
+
+
+def _format_result(result):
+    memory = result["peak_memory_bytes"]
+    memory = f"{memory / 2**20:9.1f} MiB" if memory is not None else f"{'-':>13}"
+    return (f"{result['workload']:<15} {result['processes']:>9} {result['params']:<14} "
+            f"{result['engine'] + '/' + result['stats_format']:<16} {result['wall_time']:9.3f} s "
+            f"{result['events_per_sec'] or 0:>12,.0f} ev/s {result['sim_units_per_sec'] or 0:>13,.0f} t/s {memory}")
+
+
+def compare_results(current, baseline, tolerance=REGRESSION_TOLERANCE, time_floor=TIME_FLOOR):
+    """Print per-case time and memory ratios against `baseline`; return the regressed cases.
+
+    Time ratios of cases that ran under `time_floor` seconds in both runs
+    are printed but not held against the tolerance.
+    """
+    previous = {_case_key(r): r for r in baseline["results"]}
+    regressions = []
+    print(f"{'case':<60} {'time':>8} {'memory':>8}")
+    for result in current["results"]:
+        key = _case_key(result)
+        if key not in previous:
+            continue
+        old = previous[key]
+        time_ratio = result["wall_time"] / old["wall_time"] if old["wall_time"] else None
+        memory_ratio = None
+        if result["peak_memory_bytes"] and old["peak_memory_bytes"]:
+            memory_ratio = result["peak_memory_bytes"] / old["peak_memory_bytes"]
+        too_fast = max(result["wall_time"], old["wall_time"]) < time_floor
+        checked = (None if too_fast else time_ratio, memory_ratio)
+        regressed = any(ratio is not None and ratio > 1 + tolerance for ratio in checked)
+        if regressed:
+            regressions.append(key)
+        cells = [f"{ratio:8.2f}" if ratio is not None else f"{'-':>8}" for ratio in (time_ratio, memory_ratio)]
+        note = "  REGRESSION" if regressed else "  (below time floor)" if too_fast else ""
+        print(f"{' '.join(map(str, key)):<60} {' '.join(cells)}{note}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the MLFQ scheduler core.")
+    parser.add_argument("--suite", action="store_true", help="run the full benchmark suite")
+    parser.add_argument("--quick", action="store_true", help=f"suite at scales {QUICK_SCALES} only")
+    parser.add_argument("--scales", type=int, nargs="+", help=f"process counts (default {SCALES})")
+    parser.add_argument("--workloads", nargs="+", choices=sorted(WORKLOADS))
+    parser.add_argument("--params", nargs="+", choices=sorted(PARAM_SETS), help="parameter sets to run")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, help="only run modes using these engines")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="timed runs per case and round")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="timed passes over the whole suite")
+    parser.add_argument("--time-floor", type=float, default=TIME_FLOOR,
+                        help="seconds below which --compare ignores time ratios")
+    args = parser.parse_args(argv)
+
+    if not args.suite:
+        bench_scaling()
+        print()
+        bench_arrivals()
+        print()
+        print(_format_startup(bench_startup()))
+        return 0
+
+    scales = args.scales or (QUICK_SCALES if args.quick else SCALES)
+    workloads = {name: WORKLOADS[name] for name in args.workloads or WORKLOADS}
+    param_sets = {name: PARAM_SETS[name] for name in args.params or PARAM_SETS}
+    modes = [mode for mode in MODES if not args.engines or mode[0] in args.engines]
+
+    mismatches = check_modes(workloads, scales, modes, param_sets)
+    for mismatch in mismatches:
+        print("MISMATCH with the tick engine: " + " ".join(map(str, mismatch)))
+    if mismatches:
+        return 1
+    print("All modes match the tick engine's stats.\n")
+
+    report = run_suite(workloads, scales, modes, param_sets, memory=not args.no_memory, repeats=args.repeats,
+                       rounds=args.rounds)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print()
+        if compare_results(report, baseline, args.tolerance, args.time_floor):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
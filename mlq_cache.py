@@ -0,0 +1,167 @@
+"""Content-addressed cache of simulation results.
+
+``ResultCache.simulate`` is ``mlq_logic.simulate`` with memoization: results
+are keyed by a hash of the normalized workload, the four scheduler
+parameters and the engine fingerprint, held in an in-memory LRU tier and,
+optionally, in a directory on disk:
+
+    cache = ResultCache(max_entries=64, directory=".mlq-cache")
+    stats, timeline = cache.simulate(processes, quantum=3)
+
+The fingerprint covers ENGINE_VERSION and the source of the scheduler
+modules, so editing the engine invalidates every cached result; disk
+entries of other fingerprints live in their own subdirectory and can be
+removed with ``prune``.
+"""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import mlq_events
+import mlq_logic
+from mlq_events import Segment, Timeline
+
+# Bump when results change for reasons the scheduler sources do not show
+ENGINE_VERSION = 1
+
+_fingerprint = None
+
+
+def engine_fingerprint():
+    """Hash of ENGINE_VERSION and the mlq_logic / mlq_events sources"""
+    global _fingerprint
+    if _fingerprint is None:
+        digest = hashlib.sha256(str(ENGINE_VERSION).encode())
+        for module in (mlq_logic, mlq_events):
+            with open(module.__file__, "rb") as f:
+                digest.update(f.read())
+        _fingerprint = digest.hexdigest()
+    return _fingerprint
+
+
+def result_key(processes, quantum=3, aging_threshold=5, demotion_threshold=6, preemptive_sjf=True):
+    """Content hash of a workload and parameter set.
+
+    The workload is normalized to ``[id, arrival, burst, priority]`` rows in
+    input order (which decides tie-breaks and the order of the stats), so
+    extra keys and dict ordering do not matter.
+    """
+    if isinstance(processes, mlq_logic.ArrivalCursor):
+        raise ValueError("Results can only be cached for a process list, not an ArrivalCursor")
+    params = [int(quantum), int(aging_threshold), int(demotion_threshold), bool(preemptive_sjf)]
+    rows = [[p["id"], int(p["arrival"]), int(p["burst"]), int(p["priority"])] for p in processes]
+    digest = hashlib.sha256(engine_fingerprint().encode())
+    digest.update(json.dumps([params, rows]).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Two-tier cache of ``(stats, timeline)`` results.
+
+    The memory tier keeps at most ``max_entries`` results, least recently
+    used first out.  With a ``directory``, results are also written there as
+    JSON and found again by later processes.  Returned stats and timelines
+    are fresh copies, so callers may modify them freely.
+    """
+
+    def __init__(self, max_entries=128, directory=None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _path(self, key):
+        return os.path.join(self.directory, engine_fingerprint()[:16], key + ".json")
+
+    def get(self, key):
+        """Return ``(stats, timeline)`` for `key`, or None"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return _unpack(entry)
+        if self.directory is not None:
+            try:
+                with open(self._path(key)) as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+            if entry is not None:
+                self._remember(key, entry)
+                self.disk_hits += 1
+                return _unpack(entry)
+        self.misses += 1
+        return None
+
+    def put(self, key, stats, timeline):
+        entry = _pack(stats, timeline)
+        self._remember(key, entry)
+        if self.directory is not None:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            partial_path = f"{path}.{os.getpid()}.partial"
+            with open(partial_path, "w") as f:
+                json.dump(entry, f)
+            os.replace(partial_path, path)
+
+    def _remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def simulate(self, processes, quantum=3, aging_threshold=5, demotion_threshold=6, preemptive_sjf=True,
+                 engine="event"):
+        """Memoized ``mlq_logic.simulate``; every engine gives the same result, so `engine` is not in the key"""
+        processes = list(processes)
+        key = result_key(processes, quantum, aging_threshold, demotion_threshold, preemptive_sjf)
+        result = self.get(key)
+        if result is None:
+            stats, timeline = mlq_logic.simulate(processes, quantum, aging_threshold, demotion_threshold,
+                                                 preemptive_sjf, engine=engine)
+            self.put(key, stats, timeline)
+            result = stats, timeline
+        return result
+
+    def clear(self):
+        """Empty the memory tier (the disk tier is left alone)"""
+        self.entries.clear()
+
+    def prune(self):
+        """Delete disk entries written under other engine fingerprints; return how many directories went"""
+        if self.directory is None or not os.path.isdir(self.directory):
+            return 0
+        current = engine_fingerprint()[:16]
+        removed = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name == current or not os.path.isdir(path):
+                continue
+            for entry in os.listdir(path):
+                os.remove(os.path.join(path, entry))
+            os.rmdir(path)
+            removed += 1
+        return removed
+
+
+def _pack(stats, timeline):
+    # Lists rather than dicts keyed by pid, so non-string ids survive JSON
+    return {
+        "stats": [[pid, dict(s)] for pid, s in stats.items()],
+        "segments": [list(segment) for segment in timeline],
+    }
+
+
+def _unpack(entry):
+    stats = {pid: dict(s) for pid, s in entry["stats"]}
+    timeline = Timeline()
+    timeline.segments = [Segment(*segment) for segment in entry["segments"]]
+    return stats, timeline
@@ -0,0 +1,177 @@
+"""Structured scheduler events.
+
+The engines in ``mlq_logic`` yield ``Event`` records instead of formatted
+strings.  ``EventFormatter`` / ``format_events`` turn them back into the text
+log the GUI has always shown, and ``Timeline`` collects the SEGMENT events
+into a run-length encoded execution timeline.  ``summary_dict`` builds the
+summaries of ``mlq_stats.ProcessStats`` and ``mlq_sinks.StreamingStats``, so
+both have the same shape.
+"""
+from collections import namedtuple
+
+# Trace levels: how much an engine reports besides the final ("STATS", stats)
+TRACE_NONE = 0           # nothing but the final stats
+TRACE_TRANSITIONS = 1    # arrivals, dispatches, aging, preemption, demotion, completion, idle
+TRACE_TICKS = 2          # transitions plus one RUN event per simulated time unit
+
+# Event kinds
+ARRIVAL = "ARRIVAL"
+DISPATCH = "DISPATCH"
+RUN = "RUN"
+AGING = "AGING"
+PREEMPTION = "PREEMPTION"
+DEMOTION = "DEMOTION"
+REQUEUE = "REQUEUE"
+COMPLETION = "COMPLETION"
+IDLE = "IDLE"
+SEGMENT = "SEGMENT"
+
+# Per-process metrics of a completed process, and the percentiles summaries report
+METRICS = ("turnaround_time", "waiting_time", "response_time")
+PERCENTILES = (50, 95, 99)
+
+# kind: what happened
+# time: when it happened
+# pid/queue: the process and the queue it is in after the event
+# remaining/proc_time: its remaining burst and process time (RUN, DISPATCH, PREEMPTION)
+# from_queue: the queue it left (AGING, DEMOTION)
+# until: where an IDLE CPU jumps to, or where a SEGMENT (run starting at time) ends
+Event = namedtuple(
+    "Event",
+    ["kind", "time", "pid", "queue", "remaining", "proc_time", "from_queue", "until"],
+    defaults=(None, None, None, None, None, None),
+)
+
+
+class EventFormatter:
+    """Turns events into the text lines ``run_scheduler`` has always produced"""
+
+    def __init__(self, preemptive_sjf=True, demotion_threshold=6):
+        self.sjf_label = "SJF-P" if preemptive_sjf else "SJF"
+        self.demotion_threshold = demotion_threshold
+        self.arrived = []
+
+    def format(self, event):
+        """Return the list of log lines for one event (DISPATCH has none)"""
+        kind, time, pid, qid = event.kind, event.time, event.pid, event.queue
+        if kind == RUN:
+            if qid >= 3:
+                return [f"TIME {time}: RUN {pid} | Remaining={event.remaining} | Q={qid} (RR) | PT={event.proc_time}"]
+            algo = "FCFS" if qid == 1 else self.sjf_label
+            return [f"TIME {time}: RUN {pid} | Remaining={event.remaining} | Q{qid} ({algo}) | PT={event.proc_time}"]
+        if kind == ARRIVAL:
+            if self.arrived and self.arrived[0].time != time:
+                self.arrived = []
+            self.arrived.append(event)
+            return [self.arrival_line(event)]
+        if kind == AGING:
+            return [f"AGING: {pid} promoted from Q{event.from_queue} → Q{qid}"]
+        if kind == IDLE:
+            return [f"TIME {time}: CPU IDLE → jumping to TIME {event.until}"]
+        if kind == DISPATCH or kind == SEGMENT:
+            return []
+
+        if kind == PREEMPTION:
+            line = f"PREEMPTION: {pid} preempted in Q{qid} (shorter job arrived)"
+        elif kind == COMPLETION:
+            line = f"PROCESS {pid} completed at TIME {time}"
+        elif kind == DEMOTION:
+            line = f"DEMOTION: {pid} demoted from Q{event.from_queue} → Q{qid} (PT reached {self.demotion_threshold})"
+        else:
+            line = f"{pid} quantum expired → back to Q{qid}"
+        # The text log re-announces the arrivals of the instant a run ends on
+        return [line] + [self.arrival_line(e) for e in self.arrived if e.time == time]
+
+    @staticmethod
+    def arrival_line(event):
+        return f"ARRIVAL: {event.pid} arrived at TIME {event.time} → added to Q{event.queue}"
+
+
+Segment = namedtuple("Segment", ["start", "end", "pid", "queue"])
+
+
+class Timeline:
+    """Run-length encoded execution timeline.
+
+    Holds one ``Segment(start, end, pid, queue)`` per stretch of CPU time, so
+    its size follows the number of context switches rather than simulated
+    time.  Back-to-back runs of the same process in the same queue (e.g. a
+    quantum expiry with nobody else waiting) are merged.
+    """
+
+    def __init__(self):
+        self.segments = []
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def add(self, start, end, pid, queue):
+        segments = self.segments
+        if segments:
+            last = segments[-1]
+            if last.end == start and last.pid == pid and last.queue == queue:
+                segments[-1] = last._replace(end=end)
+                return
+        segments.append(Segment(start, end, pid, queue))
+
+    def feed(self, event):
+        """Record the event if it is a SEGMENT, ignore anything else"""
+        if event.kind == SEGMENT:
+            self.add(event.time, event.until, event.pid, event.queue)
+
+    def by_process(self):
+        """Map pid -> list of (start, duration) ranges, the shape broken_barh takes"""
+        ranges = {}
+        for start, end, pid, _ in self.segments:
+            ranges.setdefault(pid, []).append((start, end - start))
+        return ranges
+
+
+def draw_gantt(timeline, ax):
+    """Draw `timeline` as a Gantt chart on a matplotlib ``ax`` (GUI and ``mlq.py --plot``)"""
+    # One broken_barh per process: artists scale with processes, not with time
+    ranges = timeline.by_process()
+    pids = sorted(ranges)
+    for row, pid in enumerate(pids):
+        # "C0".."C9" is matplotlib's default tab10 cycle, so this module never imports matplotlib
+        ax.broken_barh(ranges[pid], (row - 0.4, 0.8), facecolors=f"C{row % 10}", edgecolor="black", linewidth=0.5)
+
+    ax.set_xlabel("Time", fontsize=12)
+    ax.set_ylabel("Process", fontsize=12)
+    ax.set_title("Gantt Chart - Process Execution Timeline", fontsize=14, fontweight="bold")
+    ax.set_yticks(range(len(pids)))
+    ax.set_yticklabels(pids)
+    ax.grid(axis="x", alpha=0.3, linestyle="--")
+    if timeline.segments:
+        ax.set_xlim(timeline.segments[0].start - 0.5, timeline.segments[-1].end + 0.5)
+
+
+def summary_dict(count, describe):
+    """``{"count": count, metric: {"mean", "p50", "p95", "p99", "max"}, ...}`` for every metric.
+
+    ``describe(metric)`` returns its ``(mean, percentiles, max)``, with one
+    value per PERCENTILES; it is only called when `count` is not 0, and
+    every entry is 0.0 otherwise.
+    """
+    result = {"count": count}
+    for metric in METRICS:
+        mean, percentiles, maximum = describe(metric) if count else (0.0, [0.0] * len(PERCENTILES), 0.0)
+        result[metric] = {"mean": float(mean), **{f"p{p}": float(value) for p, value in zip(PERCENTILES, percentiles)},
+                          "max": float(maximum)}
+    return result
+
+
+def format_events(events, preemptive_sjf=True, demotion_threshold=6, format_event=None):
+    """Yield text lines for a stream of events, passing ("STATS", stats) through.
+
+    ``format_event`` replaces ``EventFormatter.format`` (e.g. a timed wrapper).
+    """
+    format_event = format_event or EventFormatter(preemptive_sjf, demotion_threshold).format
+    for event in events:
+        if isinstance(event, Event):
+            yield from format_event(event)
+        else:
+            yield event
@@ -0,0 +1,140 @@
+"""Synthetic workloads drawn with vectorized NumPy sampling.
+
+``generate`` draws all arrival gaps, bursts and priorities of a workload
+as arrays at once, so a million processes take well under a second:
+
+    workload = generate(100_000, arrival="bursty", rate=0.2, burst="pareto", mean_burst=4,
+                        priorities=(0.4, 0.3, 0.2, 0.1), seed=7)
+    *_, (_, stats) = iter_events(workload.processes(), trace=TRACE_NONE)
+
+Arrival processes (``rate`` is the mean number of arrivals per time unit):
+
+- ``"poisson"``: exponential gaps between arrivals.
+- ``"bursty"``: clumps of jobs whose sizes are geometric with mean
+  ``burst_size``, with the clumps arriving as a Poisson process;
+  ``spread`` is the mean gap between jobs of one clump.
+
+Burst distributions (``mean_burst`` is the mean CPU burst):
+
+- ``"exponential"``.
+- ``"pareto"``: heavy-tailed, with tail index ``shape`` (> 1, smaller is
+  heavier).
+- ``"lognormal"``: ``shape`` is the sigma of the underlying normal.
+
+Times are rounded to integers (bursts up, to at least 1), and the same seed
+always gives the same workload.
+"""
+import numpy as np
+
+ARRIVALS = ("poisson", "bursty")
+BURSTS = ("exponential", "pareto", "lognormal")
+QUEUES = (1, 2, 3, 4)
+DEFAULT_SHAPE = {"pareto": 1.5, "lognormal": 1.0}
+
+
+class Workload:
+    """A generated workload as ``arrival``, ``burst`` and ``priority`` columns, ordered by arrival.
+
+    Ids are ``P1``, ``P2``, ... in arrival order and are only built when
+    processes are handed out.
+    """
+
+    def __init__(self, arrival, burst, priority):
+        self.arrival = arrival
+        self.burst = burst
+        self.priority = priority
+
+    def __len__(self):
+        return len(self.arrival)
+
+    def iter_processes(self):
+        """Yield process dicts in arrival order (e.g. for ``ArrivalCursor(..., presorted=True)``)"""
+        for i, (arrival, burst, priority) in enumerate(zip(self.arrival.tolist(), self.burst.tolist(),
+                                                           self.priority.tolist()), 1):
+            yield {"id": f"P{i}", "arrival": arrival, "burst": burst, "priority": priority}
+
+    def processes(self):
+        """The workload as a list of process dicts"""
+        return list(self.iter_processes())
+
+    def load(self):
+        """Offered load: total burst over the time span of the arrivals"""
+        if not len(self):
+            return 0.0
+        span = max(int(self.arrival[-1] - self.arrival[0]), 1)
+        return float(self.burst.sum()) / span
+
+    def save(self, path):
+        """Write an arrival-ordered ``.npy`` cache that ``mlq_workload.open_trace`` memory-maps"""
+        ids = np.char.add("P", np.arange(1, len(self) + 1).astype(str)) if len(self) else np.empty(0, dtype="U1")
+        table = np.empty(len(self), dtype=[("id", ids.dtype), ("arrival", np.int64), ("burst", np.int64),
+                                           ("priority", np.int8)])
+        table["id"] = ids
+        table["arrival"] = self.arrival
+        table["burst"] = self.burst
+        table["priority"] = self.priority
+        np.save(path, table)
+
+
+def _arrivals(rng, n, arrival, rate, burst_size, spread):
+    if arrival == "poisson":
+        times = np.cumsum(rng.exponential(1 / rate, n))
+    else:
+        # Enough clumps to cover n jobs in nearly every draw; topped up in the rare case it is not
+        sizes = rng.geometric(1 / burst_size, int(n / burst_size * 1.2) + 16)
+        while sizes.sum() < n:
+            sizes = np.concatenate([sizes, rng.geometric(1 / burst_size, len(sizes))])
+        clump_times = np.cumsum(rng.exponential(burst_size / rate, len(sizes)))
+        times = np.repeat(clump_times, sizes)[:n]
+        if spread:
+            # Jobs of a clump trickle in after its start
+            gaps = rng.exponential(spread, n)
+            starts = np.repeat(np.cumsum(sizes) - sizes, sizes)[:n]
+            offsets = np.cumsum(gaps)
+            offsets -= np.concatenate([[0.0], offsets])[starts]
+            times = times + offsets
+            times.sort()
+    return np.floor(times).astype(np.int64)
+
+
+def _bursts(rng, n, burst, mean_burst, shape):
+    # Rounding up adds about half a time unit on average
+    mean_burst = max(mean_burst - 0.5, mean_burst / 2)
+    if burst == "exponential":
+        values = rng.exponential(mean_burst, n)
+    elif burst == "pareto":
+        # Pareto with minimum x_m has mean x_m * shape / (shape - 1)
+        scale = mean_burst * (shape - 1) / shape
+        values = scale * (1 + rng.pareto(shape, n))
+    else:
+        mu = np.log(mean_burst) - shape ** 2 / 2
+        values = rng.lognormal(mu, shape, n)
+    return np.maximum(np.ceil(values), 1).astype(np.int64)
+
+
+def generate(n, arrival="poisson", rate=0.2, burst="exponential", mean_burst=4.0, shape=None,
+             priorities=(0.25, 0.25, 0.25, 0.25), burst_size=8.0, spread=0.0, seed=None):
+    """Draw a workload of `n` processes; see the module docstring for the parameters.
+
+    ``priorities`` gives the weights of initial queues Q1-Q4 (normalized).
+    ``seed`` is anything ``numpy.random.default_rng`` accepts, including a
+    ``SeedSequence``.
+    """
+    if arrival not in ARRIVALS:
+        raise ValueError(f"Unknown arrival process {arrival!r}, expected one of {ARRIVALS}")
+    if burst not in BURSTS:
+        raise ValueError(f"Unknown burst distribution {burst!r}, expected one of {BURSTS}")
+    if n < 0 or rate <= 0 or mean_burst <= 0 or burst_size < 1 or spread < 0:
+        raise ValueError("n must be >= 0, rate and mean_burst > 0, burst_size >= 1 and spread >= 0")
+    shape = DEFAULT_SHAPE.get(burst) if shape is None else shape
+    if burst == "pareto" and shape <= 1:
+        raise ValueError("A Pareto burst distribution needs shape > 1 to have a finite mean")
+    weights = np.asarray(priorities, dtype=float)
+    if weights.shape != (len(QUEUES),) or (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError(f"priorities must be {len(QUEUES)} non-negative weights, got {priorities!r}")
+
+    rng = np.random.default_rng(seed)
+    arrivals = _arrivals(rng, n, arrival, rate, burst_size, spread)
+    bursts = _bursts(rng, n, burst, mean_burst, shape)
+    priority = rng.choice(np.asarray(QUEUES, dtype=np.int64), size=n, p=weights / weights.sum())
+    return Workload(arrivals, bursts, priority)
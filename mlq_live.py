@@ -0,0 +1,352 @@
+"""Online scheduling of a live job feed with asyncio.
+
+``LiveRunner`` takes an async iterator of process dicts in arrival order
+(e.g. ``feed_lines`` over a socket or ``tail_file`` over a growing JSONL
+file) and schedules jobs as they come in.  Simulated time follows the feed:
+once a job arriving at T has been received, no job can still arrive before
+T, so the event engine is advanced to T - 1 with ``EventScheduler.run(until=...)``.
+A bare number in the feed is a heartbeat with the same meaning, which lets
+time advance while no jobs arrive.
+
+Event batches and rolling metrics are published to subscribers through
+bounded queues.  A slow subscriber makes the runner wait, which stops it
+reading the feed once ``max_pending`` jobs are waiting to be simulated, so
+memory stays bounded and the pressure reaches the producer:
+
+    runner = LiveRunner(feed_lines(reader), quantum=3)
+    metrics = runner.subscribe("metrics")
+
+    async def show():
+        async for snapshot in metrics:
+            print(snapshot["time"], snapshot["completed"], snapshot["avg_turnaround"])
+
+    stats, _ = await asyncio.gather(runner.run(), show())
+
+The events and stats are those of a batch run over the same jobs.
+"""
+import asyncio
+import json
+import time as wallclock
+from collections import deque
+
+from mlq_events import Event, COMPLETION, TRACE_TRANSITIONS
+from mlq_logic import STATS_FORMATS, ArrivalCursor, EventScheduler
+from mlq_sinks import MultiSink
+from mlq_workload import check_process
+
+SUBSCRIPTION_KINDS = ("events", "metrics")
+
+
+class FeedCursor(ArrivalCursor):
+    """An ArrivalCursor the runner appends received jobs to.
+
+    ``watermark`` is the time before which no more jobs can arrive.  While
+    the feed is open and nothing is buffered, the watermark stands in for
+    the next arrival time; the runner never advances past it.
+    """
+
+    def __init__(self):
+        self.buffer = deque()
+        self.watermark = 0
+        self.closed = False
+        self.handed_out = 0
+
+    def append(self, process):
+        if process["arrival"] < self.watermark:
+            raise ValueError(f"Feed is not sorted: {process['id']} arrives at {process['arrival']}, "
+                             f"after time {self.watermark} was reached")
+        self.buffer.append(process)
+        self.watermark = process["arrival"]
+
+    def advance(self, time):
+        """Heartbeat: no job arrives before `time`"""
+        if time > self.watermark:
+            self.watermark = time
+
+    def close(self):
+        self.closed = True
+
+    def arrivals_at(self, time):
+        buffer = self.buffer
+        batch = []
+        while buffer and buffer[0]["arrival"] <= time:
+            batch.append(buffer.popleft())
+        self.handed_out += len(batch)
+        return batch
+
+    def skip(self, count):
+        raise ValueError("A live feed cannot be rewound to resume a snapshot")
+
+    def next_arrival_time(self):
+        if self.buffer:
+            return self.buffer[0]["arrival"]
+        return None if self.closed else self.watermark
+
+    def exhausted(self):
+        return self.closed and not self.buffer
+
+
+class RollingMetrics:
+    """Aggregates over the last `window` completions plus overall counters"""
+
+    def __init__(self, window=1000):
+        self.window = deque(maxlen=window)
+        self.sums = [0, 0, 0]
+        self.completed = 0
+
+    def add(self, completion_time, turnaround, waiting, response):
+        window = self.window
+        if len(window) == window.maxlen:
+            _, *old = window[0]
+            for i, value in enumerate(old):
+                self.sums[i] -= value
+        window.append((completion_time, turnaround, waiting, response))
+        self.sums[0] += turnaround
+        self.sums[1] += waiting
+        self.sums[2] += response
+        self.completed += 1
+
+    def write(self, record):
+        """Sink interface, for runs that evict completed processes"""
+        self.add(record["completion_time"], record["turnaround_time"], record["waiting_time"],
+                 record["response_time"])
+
+    def snapshot(self):
+        window = self.window
+        count = len(window)
+        span = window[-1][0] - window[0][0] if count > 1 else 0
+        return {
+            "completed": self.completed,
+            "avg_turnaround": self.sums[0] / count if count else 0.0,
+            "avg_waiting": self.sums[1] / count if count else 0.0,
+            "avg_response": self.sums[2] / count if count else 0.0,
+            # Completions per simulated time unit across the window
+            "throughput": (count - 1) / span if span else 0.0,
+        }
+
+
+class LiveRunner:
+    """Schedules jobs from an async feed as they arrive.
+
+    ``feed`` yields process dicts (``{"id", "arrival", "burst",
+    "priority"}``) ordered by arrival, or numbers as heartbeats.  Events at
+    ``trace`` level are published in batches, and metrics at most every
+    ``metrics_interval`` seconds of wall time (plus once at the end).
+
+    For endless feeds pass a ``sink`` (see ``mlq_sinks``): completed
+    processes are then written to it and evicted, and the final stats only
+    hold processes that never completed.
+    """
+
+    def __init__(self, feed, quantum=3, aging_threshold=5, demotion_threshold=6, preemptive_sjf=True,
+                 trace=TRACE_TRANSITIONS, window=1000, max_pending=4096, metrics_interval=0.5, sink=None):
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.feed = feed
+        self.cursor = FeedCursor()
+        self.scheduler = EventScheduler(self.cursor, quantum, aging_threshold, demotion_threshold, preemptive_sjf)
+        self.trace = trace
+        self.metrics = RollingMetrics(window)
+        self.sink = sink
+        # Rolling metrics come from the evicted records when there is a sink
+        self._sink = MultiSink(self.metrics, sink) if sink is not None else None
+        self.max_pending = max_pending
+        self.metrics_interval = metrics_interval
+        self.received = 0
+        # Jobs received since the scheduler last caught up with the feed
+        self.pending = 0
+        self.subscribers = {kind: [] for kind in SUBSCRIPTION_KINDS}
+        self._wake = None
+        self._drained = None
+        self._started = None
+        self._last_metrics = None
+
+    def subscribe(self, kind="events", maxsize=16, lossy=False):
+        """Return an async iterator of event batches (lists of ``Event``) or metric dicts.
+
+        Subscribe inside the event loop, before ``run()``.  A full queue makes the runner wait,
+        unless ``lossy``, in which case the oldest item is dropped instead
+        (for e.g. dashboards that only want recent metrics).
+        """
+        if kind not in SUBSCRIPTION_KINDS:
+            raise ValueError(f"Unknown subscription {kind!r}, expected one of {SUBSCRIPTION_KINDS}")
+        queue = asyncio.Queue(maxsize)
+        self.subscribers[kind].append((queue, lossy))
+        return _drain(queue)
+
+    async def run(self, stats_format="dict"):
+        """Consume the whole feed and return the final stats once every job has completed"""
+        if stats_format not in STATS_FORMATS:
+            raise ValueError(f"Unknown stats format {stats_format!r}, expected one of {STATS_FORMATS}")
+        # Created here, inside the running loop (older Pythons bind them to a loop on creation)
+        self._wake = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._started = self._last_metrics = wallclock.monotonic()
+        reader = asyncio.ensure_future(self._read_feed())
+        try:
+            stats = await self._simulate(reader, stats_format)
+        except BaseException:
+            reader.cancel()
+            for queues in self.subscribers.values():
+                for queue, _ in queues:
+                    _put_final(queue)
+            raise
+        for queues in self.subscribers.values():
+            for queue, _ in queues:
+                await queue.put(None)
+        return stats
+
+    async def _read_feed(self):
+        cursor = self.cursor
+        try:
+            async for item in self.feed:
+                if isinstance(item, dict):
+                    cursor.append(item)
+                    self.received += 1
+                    self.pending += 1
+                else:
+                    cursor.advance(item)
+                self._wake.set()
+                if self.pending >= self.max_pending:
+                    self._drained.clear()
+                    await self._drained.wait()
+            cursor.close()
+        finally:
+            self._wake.set()
+
+    async def _simulate(self, reader, stats_format):
+        cursor = self.cursor
+        scheduler = self.scheduler
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            if reader.done():
+                # Re-raises a feed error; after a clean end the cursor is closed
+                reader.result()
+            if cursor.closed:
+                until = None
+            else:
+                until = cursor.watermark - 1
+                if until <= scheduler.time:
+                    self.pending = 0
+                    self._drained.set()
+                    continue
+            events = list(scheduler.run(max(self.trace, TRACE_TRANSITIONS), until, stats_format, sink=self._sink))
+            self.pending = 0
+            self._drained.set()
+            final = events.pop() if events and not isinstance(events[-1], Event) else None
+            await self._publish(events, final is not None)
+            if final is not None:
+                return final[1]
+
+    async def _publish(self, events, last):
+        if self._sink is None:
+            stats = self.scheduler.stats
+            add = self.metrics.add
+            for event in events:
+                if event.kind == COMPLETION:
+                    s = stats[event.pid]
+                    first_response = s["first_response_time"]
+                    add(event.time, event.time - s["arrival_time"], s["total_waiting_time"],
+                        first_response - s["arrival_time"] if first_response else 0)
+        if events and self.trace >= TRACE_TRANSITIONS:
+            for queue, lossy in self.subscribers["events"]:
+                await _put(queue, events, lossy)
+        now = wallclock.monotonic()
+        if self.subscribers["metrics"] and (last or now - self._last_metrics >= self.metrics_interval):
+            self._last_metrics = now
+            metrics = self.snapshot_metrics(now)
+            for queue, lossy in self.subscribers["metrics"]:
+                await _put(queue, metrics, lossy)
+
+    def snapshot_metrics(self, now=None):
+        """Current rolling metrics, queue lengths and ingestion counters"""
+        now = wallclock.monotonic() if now is None else now
+        elapsed = now - self._started if self._started is not None else 0.0
+        scheduler = self.scheduler
+        metrics = self.metrics.snapshot()
+        metrics.update({
+            "time": scheduler.time,
+            "received": self.received,
+            "arrived": self.cursor.handed_out,
+            "backlog": len(self.cursor.buffer),
+            "queued": dict(scheduler.queues.size),
+            "wall_time": elapsed,
+            "jobs_per_second": self.received / elapsed if elapsed else 0.0,
+        })
+        return metrics
+
+
+async def _put(queue, item, lossy):
+    if lossy and queue.full():
+        queue.get_nowait()
+    await queue.put(item)
+
+
+def _put_final(queue):
+    # The run failed: make room for the end marker rather than wait for a consumer
+    while queue.full():
+        queue.get_nowait()
+    queue.put_nowait(None)
+
+
+async def _drain(queue):
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        yield item
+
+
+def parse_line(line, where="feed"):
+    """One JSONL feed line: a process object, a number (heartbeat) or None for a blank line"""
+    if isinstance(line, bytes):
+        line = line.decode()
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{where}: invalid JSON ({e.msg})") from None
+    if isinstance(record, dict):
+        return check_process(record, where)
+    if isinstance(record, int) and not isinstance(record, bool):
+        return record
+    raise ValueError(f"{where}: expected an object or a heartbeat time, got {type(record).__name__}")
+
+
+async def feed_lines(lines, name="feed"):
+    """Turn an async iterator of JSONL lines (e.g. an ``asyncio.StreamReader``) into a feed"""
+    line_num = 0
+    async for line in lines:
+        line_num += 1
+        item = parse_line(line, f"{name}:{line_num}")
+        if item is not None:
+            yield item
+
+
+async def tail_file(path, follow=True, poll_interval=0.1, stop_line="END"):
+    """Yield the lines of a JSONL file, then keep yielding lines appended to it.
+
+    With ``follow`` the file is polled every `poll_interval` seconds until a
+    line reading `stop_line` is appended; without, reading stops at the end
+    of the file.
+    """
+    with open(path) as f:
+        partial = ""
+        while True:
+            line = f.readline()
+            if not line:
+                if not follow:
+                    break
+                await asyncio.sleep(poll_interval)
+                continue
+            if follow and not line.endswith("\n"):
+                # The writer is mid-line: wait for the rest of it
+                partial += line
+                continue
+            line, partial = partial + line, ""
+            if line.strip() == stop_line:
+                break
+            yield line
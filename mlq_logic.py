@@ -1,99 +1,530 @@
-from collections import deque
-
-def run_scheduler(processes, quantum=3, aging_threshold=5, demotion_threshold=6, preemptive_sjf=True):
-    queues = {1: deque(), 2: deque(), 3: deque(), 4: deque()}
-    remaining = {p["id"]: p["burst"] for p in processes}
-    priority = {p["id"]: p["priority"] for p in processes}
-    proc_time = {p["id"]: 0 for p in processes}
-    wait_time = {p["id"]: 0 for p in processes}
-    queue_entry_time = {p["id"]: -1 for p in processes}
-    completed = set()
+import json
+from array import array
+from collections import Counter, deque
+from heapq import heapify, heappush, heappop
+
+from mlq_events import (
+    Event, EventFormatter, format_events, TRACE_TRANSITIONS, TRACE_TICKS,
+    ARRIVAL, DISPATCH, RUN, AGING, PREEMPTION, DEMOTION, REQUEUE, COMPLETION, IDLE, SEGMENT, Timeline,
+)
+
+ENGINES = ("tick", "event", "compact")
+STATS_FORMATS = ("dict", "columns")
+# Bumped whenever the layout of EventScheduler.snapshot() changes
+SNAPSHOT_VERSION = 1
+
+
+class ArrivalCursor:
+    """Hands out processes in arrival order from a list sorted once up front.
+
+    With ``presorted=True`` any iterable already ordered by arrival time
+    (e.g. a generator reading a trace) is consumed lazily, one process ahead,
+    without being buffered.  A cursor can be passed to ``run_scheduler`` in
+    place of the process list; it is consumed by that single run.
+    """
+
+    def __init__(self, processes, presorted=False):
+        if not presorted:
+            processes = sorted(processes, key=lambda p: p["arrival"])
+        self.source = iter(processes)
+        self.upcoming = next(self.source, None)
+        self.handed_out = 0
+
+    def arrivals_at(self, time):
+        """Processes arriving at `time` that were not handed out yet, in input order"""
+        batch = []
+        while self.upcoming is not None and self.upcoming["arrival"] <= time:
+            batch.append(self.upcoming)
+            following = next(self.source, None)
+            if following is not None and following["arrival"] < self.upcoming["arrival"]:
+                raise ValueError(f"Arrival stream is not sorted: {following['id']} arrives at "
+                                 f"{following['arrival']} after {self.upcoming['id']} at {self.upcoming['arrival']}")
+            self.upcoming = following
+        self.handed_out += len(batch)
+        return batch
+
+    def skip(self, count):
+        """Drop the next `count` processes unseen (they arrived before a snapshot)"""
+        for _ in range(count):
+            if self.upcoming is None:
+                raise ValueError("Arrival stream is shorter than the snapshot expects")
+            self.upcoming = next(self.source, None)
+        self.handed_out += count
+
+    def next_arrival_time(self):
+        """Arrival time of the next process that has not arrived yet, or None"""
+        return self.upcoming["arrival"] if self.upcoming is not None else None
+
+    def exhausted(self):
+        return self.upcoming is None
+
+
+class ReadyQueues:
+    """The four ready queues plus an index of where each queued process sits.
+
+    Q1, Q3 and Q4 are FIFO deques and Q2 is a heap ordered by remaining
+    burst, ties broken by enqueue order (the same order ``min`` over a deque
+    would pick).  Every push gets a sequence number and the index maps
+    ``pid -> (qid, seq)``, so membership and removal are O(1): removing a
+    process only drops it from the index, and its stale entry is discarded
+    when it reaches the head of its queue.
+
+    Aging is tracked the same way: a push into Q2-Q4 schedules an aging
+    deadline at ``time + aging_threshold`` in a min-heap.  Dispatching,
+    preempting or moving the process gives it a new sequence number, which
+    cancels the old deadline without touching the heap.
+    """
+
+    def __init__(self, remaining, aging_threshold):
+        self.remaining = remaining
+        self.aging_threshold = aging_threshold
+        self.fifo = {1: deque(), 3: deque(), 4: deque()}
+        self.sjf = []
+        self.deadlines = []
+        self.size = {1: 0, 2: 0, 3: 0, 4: 0}
+        self.location = {}
+        self.seq = 0
+
+    def __contains__(self, pid):
+        return pid in self.location
+
+    def __len__(self):
+        return len(self.location)
+
+    def queue_of(self, pid):
+        entry = self.location.get(pid)
+        return entry[0] if entry else None
+
+    def push(self, pid, qid, time):
+        """Append pid to the back of queue qid at `time` (moving it if already queued)"""
+        if pid in self.location:
+            self.remove(pid)
+        self.seq += 1
+        self.location[pid] = (qid, self.seq)
+        self.size[qid] += 1
+        if qid > 1:
+            if len(self.deadlines) > 2 * len(self.location) + 64:
+                self._purge_deadlines()
+            heappush(self.deadlines, (time + self.aging_threshold, self.seq, pid))
+        if qid == 2:
+            if len(self.sjf) > 2 * self.size[2] + 64:
+                self._purge_queue(2)
+            # Remaining burst cannot change while a process waits in a queue
+            heappush(self.sjf, (self.remaining[pid], self.seq, pid))
+        else:
+            if len(self.fifo[qid]) > 2 * self.size[qid] + 64:
+                self._purge_queue(qid)
+            self.fifo[qid].append((self.seq, pid))
+
+    def remove(self, pid):
+        qid, _ = self.location.pop(pid)
+        self.size[qid] -= 1
+        return qid
+
+    def highest(self):
+        """Return the highest priority non-empty queue, or None"""
+        for qid in [1, 2, 3, 4]:
+            if self.size[qid]:
+                return qid
+        return None
+
+    def _head(self, qid):
+        if qid == 2:
+            heap = self.sjf
+            while self.location.get(heap[0][2]) != (2, heap[0][1]):
+                heappop(heap)
+            return heap[0][2]
+        queue = self.fifo[qid]
+        while self.location.get(queue[0][1]) != (qid, queue[0][0]):
+            queue.popleft()
+        return queue[0][1]
+
+    def pop(self, qid):
+        """Remove and return the next process of queue qid (FCFS/RR head or shortest SJF job)"""
+        pid = self._head(qid)
+        self.remove(pid)
+        return pid
+
+    def shortest_remaining(self):
+        """Remaining burst of the shortest job waiting in Q2, or None"""
+        if not self.size[2]:
+            return None
+        return self.remaining[self._head(2)]
+
+    def _purge_queue(self, qid):
+        # Entries of moved or dispatched processes are normally dropped at the queue head, but
+        # a queue that keeps draining to empty would never get to them
+        location = self.location
+        if qid == 2:
+            self.sjf = [entry for entry in self.sjf if location.get(entry[2]) == (2, entry[1])]
+            heapify(self.sjf)
+        else:
+            self.fifo[qid] = deque(entry for entry in self.fifo[qid] if location.get(entry[1]) == (qid, entry[0]))
+
+    def _deadline_is_live(self, entry):
+        location = self.location.get(entry[2])
+        return location is not None and location[1] == entry[1]
+
+    def _purge_deadlines(self):
+        # Cancelled deadlines far in the future would otherwise pile up until their time comes
+        self.deadlines = [entry for entry in self.deadlines if self._deadline_is_live(entry)]
+        heapify(self.deadlines)
+
+    def next_deadline(self):
+        """Earliest pending aging deadline, or None"""
+        heap = self.deadlines
+        while heap and not self._deadline_is_live(heap[0]):
+            heappop(heap)
+        return heap[0][0] if heap else None
+
+    def due_for_aging(self, time):
+        """Pop the processes whose aging deadline has passed at `time`.
+
+        Returns ``(pid, qid)`` pairs ordered Q2 first, then Q3 and Q4, each
+        in enqueue order, which is the order a scan of the queues yields.
+        """
+        heap = self.deadlines
+        due = []
+        while heap and heap[0][0] <= time:
+            entry = heappop(heap)
+            if self._deadline_is_live(entry):
+                due.append(self.location[entry[2]] + (entry[2],))
+        due.sort()
+        return [(pid, qid) for qid, _, pid in due]
+
+
+def run_scheduler(processes, quantum=3, aging_threshold=5, demotion_threshold=6, preemptive_sjf=True,
+                  engine="tick", profiler=None):
+    """Simulate the MLFQ scheduler and return a generator of log lines.
+
+    The generator yields one formatted string per scheduling event and ends
+    with a ``("STATS", stats)`` tuple.  ``engine`` selects how time advances:
+
+    - ``"tick"``: the reference engine, steps time one unit at a time.
+    - ``"event"``: discrete-event engine, jumps straight to the next arrival,
+      aging deadline, completion, quantum expiry or SJF preemption point.
+      It produces exactly the same output as the tick engine.
+    - ``"compact"``: the event engine with per-process state in flat arrays
+      indexed by arrival order, for very large traces.  Same output again.
+
+    ``processes`` is a list of ``{"id", "arrival", "burst", "priority"}``
+    dicts, or an ``ArrivalCursor`` over an arrival-ordered stream of them.
+
+    This is a text adapter over ``iter_events`` at ``TRACE_TICKS``.  A
+    ``mlq_profile.Profiler`` also times the formatting of the log.
+    """
+    events = iter_events(processes, quantum, aging_threshold, demotion_threshold, preemptive_sjf,
+                         engine=engine, trace=TRACE_TICKS, profiler=profiler)
+    if profiler is None:
+        return format_events(events, preemptive_sjf, demotion_threshold)
+    format_event = profiler.timed("format_events", EventFormatter(preemptive_sjf, demotion_threshold).format)
+    return format_events(events, format_event=format_event)
+
+
+def iter_events(processes, quantum=3, aging_threshold=5, demotion_threshold=6, preemptive_sjf=True,
+                engine="event", trace=TRACE_TRANSITIONS, stats_format="dict", profiler=None, sink=None):
+    """Simulate the MLFQ scheduler and return a generator of ``Event`` records.
+
+    ``trace`` sets how much is reported before the final ``("STATS", stats)``:
+    ``TRACE_NONE`` (nothing), ``TRACE_TRANSITIONS`` (every state change) or
+    ``TRACE_TICKS`` (state changes plus a RUN event per time unit).  Lower
+    levels skip building the events altogether, and the event engine below
+    ``TRACE_TICKS`` never visits individual ticks.
+
+    Every run ends with a SEGMENT event (``time`` to ``until``) that
+    ``Timeline`` turns into a compressed execution timeline.
+
+    With ``stats_format="columns"`` the final stats are a
+    ``mlq_stats.ProcessStats`` (NumPy columns with vectorized summaries)
+    instead of a dict; it still reads like the dict via ``stats[pid]``.
+
+    A ``mlq_profile.Profiler`` (tick and event engines) collects phase
+    timings, counters and queue-length histograms for the run.
+
+    With a ``sink`` (tick and event engines, see ``mlq_sinks``) every process
+    is handed to ``sink.write(record)`` as soon as it completes and then
+    forgotten, so memory follows the number of live processes; the final
+    stats then only hold processes that never completed.
+    """
+    if quantum < 1 or aging_threshold < 1:
+        raise ValueError("quantum and aging_threshold must be at least 1")
+    if stats_format not in STATS_FORMATS:
+        raise ValueError(f"Unknown stats format {stats_format!r}, expected one of {STATS_FORMATS}")
+    if not isinstance(processes, ArrivalCursor):
+        processes = list(processes)
+    if engine == "tick":
+        if profiler is None:
+            return _run_tick_engine(processes, quantum, aging_threshold, demotion_threshold, preemptive_sjf, trace,
+                                    stats_format, sink=sink)
+        events = _run_tick_engine(processes, quantum, aging_threshold, demotion_threshold, preemptive_sjf,
+                                  max(trace, TRACE_TRANSITIONS), stats_format, profiler, sink)
+        return profiler.observe(events, trace)
+    if engine == "event":
+        scheduler = EventScheduler(processes, quantum, aging_threshold, demotion_threshold, preemptive_sjf)
+        return scheduler.run(trace, stats_format=stats_format, profiler=profiler, sink=sink)
+    if profiler is not None and engine in ENGINES:
+        raise ValueError(f"Profiling is supported by the tick and event engines, not {engine!r}")
+    if sink is not None and engine in ENGINES:
+        raise ValueError(f"Streaming sinks are supported by the tick and event engines, not {engine!r}")
+    if engine == "compact":
+        return _run_compact_engine(processes, quantum, aging_threshold, demotion_threshold, preemptive_sjf, trace,
+                                   stats_format)
+    raise ValueError(f"Unknown engine {engine!r}, expected one of {ENGINES}")
+
+
+def simulate(processes, quantum=3, aging_threshold=5, demotion_threshold=6, preemptive_sjf=True,
+             engine="event"):
+    """Run a whole simulation and return ``(stats, timeline)``.
+
+    Only SEGMENT events are kept, folded into a ``Timeline``, so memory
+    follows the number of context switches rather than simulated time.
+    """
+    timeline = Timeline()
+    for event in iter_events(processes, quantum, aging_threshold, demotion_threshold, preemptive_sjf,
+                             engine=engine, trace=TRACE_TRANSITIONS):
+        if isinstance(event, Event):
+            timeline.feed(event)
+        else:
+            stats = event[1]
+    return stats, timeline
+
+
+def _new_stats(p):
+    return {
+        "arrival_time": p["arrival"],
+        "burst_time": p["burst"],
+        "first_response_time": None,
+        "completion_time": None,
+        "total_waiting_time": 0,
+        "last_wait_start": None
+    }
+
+
+def _duplicate_id(p, time):
+    # A second process under a live id would silently overwrite the first one's state
+    return ValueError(f"Duplicate process id {p['id']!r} (arriving at {time}): "
+                      "an earlier process of this run has the same id")
+
+
+def _duplicate_stream_id(pid):
+    # The compact engine only checks a streamed trace once the run is over
+    return ValueError(f"Duplicate process id {pid!r}: two processes of this run have the same id")
+
+
+def _retire(pid, stats, initial_priority, sink):
+    """Hand a completed process's final record to `sink` and forget its stats"""
+    s = stats.pop(pid)
+    arrival = s["arrival_time"]
+    first_response = s["first_response_time"]
+    sink.write({
+        "pid": pid,
+        "arrival_time": arrival,
+        "burst_time": s["burst_time"],
+        "priority": initial_priority.pop(pid),
+        "first_response_time": first_response,
+        "completion_time": s["completion_time"],
+        "turnaround_time": s["completion_time"] - arrival,
+        "waiting_time": s["total_waiting_time"],
+        "response_time": first_response - arrival if first_response else 0,
+    })
+
+
+def _final_stats(stats, processes, initial_priority, stats_format):
+    """Fill in TAT/WT/RT and return stats in the order of the input process list"""
+    if not isinstance(processes, ArrivalCursor):
+        stats = {p["id"]: stats[p["id"]] for p in processes if p["id"] in stats}
+    if stats_format == "columns":
+        # Imported here so dict-only callers never pay for NumPy
+        from mlq_stats import ProcessStats
+        return ProcessStats.from_dict(stats, initial_priority)
+    for pid, s in stats.items():
+        if s["completion_time"] is not None:
+            s["turnaround_time"] = s["completion_time"] - s["arrival_time"]
+            s["waiting_time"] = s["total_waiting_time"]
+            s["response_time"] = s["first_response_time"] - s["arrival_time"] if s["first_response_time"] else 0
+    return stats
+
+
+class _PackedIds:
+    """Process ids of a streamed run, UTF-8 encoded back to back in one ``bytearray``.
+
+    ``ids[row]`` decodes a single id, so a process costs its encoded length
+    plus an 8-byte offset instead of a Python string of its own.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.ends = array("q")
+        # Longest id in bytes, which is at least its length in characters
+        self.width = 1
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __getitem__(self, row):
+        return self.data[self.ends[row - 1] if row else 0:self.ends[row]].decode()
+
+    def __iter__(self):
+        return (self[row] for row in range(len(self)))
+
+    def append(self, pid):
+        encoded = pid.encode()
+        self.data += encoded
+        self.ends.append(len(self.data))
+        if len(encoded) > self.width:
+            self.width = len(encoded)
+
+    def column(self, chunk_size=65536):
+        """The ids as a fixed-width NumPy str array, decoded `chunk_size` at a time"""
+        import numpy as np
+
+        column = np.empty(len(self), dtype=f"U{self.width}")
+        for start in range(0, len(self), chunk_size):
+            stop = min(start + chunk_size, len(self))
+            column[start:stop] = [self[row] for row in range(start, stop)]
+        return column
+
+
+class _CompactColumns:
+    """Per-process state of the compact engine, one ``array`` per field.
+
+    Row ``i`` is the i-th process to arrive.  Times that have not happened
+    yet are -1, so every column stays a flat array of machine integers
+    (65 bytes per process in total, against several hundred for the dicts
+    the other engines keep).
+    """
+
+    def __init__(self):
+        self.arrival_time = array("q")
+        self.burst_time = array("q")
+        self.priority = array("b")
+        self.remaining = array("q")
+        self.proc_time = array("q")
+        self.first_response_time = array("q")
+        self.completion_time = array("q")
+        self.total_waiting_time = array("q")
+        self.last_wait_start = array("q")
+
+    def append(self, arrival, burst, priority):
+        self.arrival_time.append(arrival)
+        self.burst_time.append(burst)
+        self.priority.append(priority)
+        self.remaining.append(burst)
+        self.proc_time.append(0)
+        self.first_response_time.append(-1)
+        self.completion_time.append(-1)
+        self.total_waiting_time.append(0)
+        self.last_wait_start.append(-1)
+
+    def final_stats(self, ids, processes, stats_format):
+        """Map rows back to string ids, in input order for a process list"""
+        streamed = isinstance(processes, ArrivalCursor)
+        if stats_format == "columns":
+            import numpy as np
+            from mlq_stats import ProcessStats
+
+            # Zero-copy views of the arrays; only a process list needs reordering
+            columns = [np.frombuffer(column, dtype=column.typecode) for column in (
+                self.arrival_time, self.burst_time, self.priority, self.first_response_time,
+                self.completion_time, self.total_waiting_time)]
+            if streamed:
+                pids = ids.column()
+                # A repeated id would make the mapping view hide a row, as it would lose one below
+                unique, counts = np.unique(pids, return_counts=True)
+                if len(unique) < len(pids):
+                    raise _duplicate_stream_id(str(unique[np.argmax(counts > 1)]))
+            else:
+                pids = np.empty(len(processes), dtype=object)
+                pids[:] = [p["id"] for p in processes]
+                columns = [column[self._input_rows(processes)] for column in columns]
+            return ProcessStats.from_columns(pids, *columns)
+
+        stats = {}
+        for row in (range(len(ids)) if streamed else self._input_rows(processes)):
+            arrival = self.arrival_time[row]
+            first_response = self.first_response_time[row]
+            completion = self.completion_time[row]
+            s = {
+                "arrival_time": arrival,
+                "burst_time": self.burst_time[row],
+                "first_response_time": first_response if first_response >= 0 else None,
+                "completion_time": completion if completion >= 0 else None,
+                "total_waiting_time": self.total_waiting_time[row],
+                "last_wait_start": self.last_wait_start[row] if self.last_wait_start[row] >= 0 else None,
+            }
+            if completion >= 0:
+                s["turnaround_time"] = completion - arrival
+                s["waiting_time"] = s["total_waiting_time"]
+                s["response_time"] = first_response - arrival if first_response else 0
+            stats[ids[row]] = s
+        if len(stats) < len(ids):
+            # Streamed input is only checked here, where a repeated id would lose a process
+            raise _duplicate_stream_id(next(pid for pid, count in Counter(ids).items() if count > 1))
+        return stats
+
+    @staticmethod
+    def _input_rows(processes):
+        """Row of each process of a list, in list order (the cursor handed them out in stable arrival order)"""
+        import numpy as np
+
+        arrival = np.fromiter((p["arrival"] for p in processes), dtype=np.int64, count=len(processes))
+        rows = np.empty(len(processes), dtype=np.intp)
+        rows[np.argsort(arrival, kind="stable")] = np.arange(len(processes))
+        return rows
+
+
+def _run_tick_engine(processes, quantum, aging_threshold, demotion_threshold, preemptive_sjf, trace, stats_format,
+                     profiler=None, sink=None):
+    transitions = trace >= TRACE_TRANSITIONS
+    ticks = trace >= TRACE_TICKS
+    arrivals = processes if isinstance(processes, ArrivalCursor) else ArrivalCursor(processes)
+    # Per-process state is created when a process arrives
+    remaining = {}
+    queues = ReadyQueues(remaining, aging_threshold)
+    priority = {}
+    initial_priority = {}
+    proc_time = {}
     
     # Track statistics
-    stats = {
-        p["id"]: {
-            "arrival_time": p["arrival"],
-            "burst_time": p["burst"],
-            "first_response_time": None,
-            "completion_time": None,
-            "total_waiting_time": 0,
-            "last_wait_start": None
-        }
-        for p in processes
-    }
+    stats = {}
 
     time = 0
 
-    def enqueue(pid, qid, reset_proc_time=False, reset_wait_time=False):
-        if pid not in queues[qid]:
-            queues[qid].append(pid)
+    def enqueue(pid, qid, reset_proc_time=False):
+        queues.push(pid, qid, time)
         priority[pid] = qid
         if reset_proc_time:
             proc_time[pid] = 0
-        if reset_wait_time:
-            wait_time[pid] = 0
-            queue_entry_time[pid] = time
         # Always reset last_wait_start when entering queue
         stats[pid]["last_wait_start"] = time
 
-    def update_waiting(running_pid=None):
-        for p in processes:
-            pid = p["id"]
-            if pid not in completed and pid != running_pid:
-                is_queued = any(pid in q for q in queues.values())
-                if is_queued and queue_entry_time[pid] != -1:
-                    wait_time[pid] = time - queue_entry_time[pid]
-
     def apply_aging():
-        promoted = []
-        for qid in [2, 3, 4]:
-            for pid in list(queues[qid]):
-                if wait_time[pid] >= aging_threshold and qid > 1:
-                    promoted.append((pid, qid))
-        
-        for pid, old_qid in promoted:
-            for qid in [1, 2, 3, 4]:
-                if pid in queues[qid]:
-                    queues[qid].remove(pid)
+        # Each queued process has a deadline at entry time + aging_threshold,
+        # so only processes whose deadline has passed are looked at
+        for pid, old_qid in queues.due_for_aging(time):
             new_qid = old_qid - 1
-            queues[new_qid].append(pid)
+            queues.push(pid, new_qid, time)
             priority[pid] = new_qid
-            wait_time[pid] = 0
-            queue_entry_time[pid] = time
             stats[pid]["last_wait_start"] = time
-            yield f"AGING: {pid} promoted from Q{old_qid} → Q{new_qid}"
+            if transitions:
+                yield Event(AGING, time, pid, new_qid, from_queue=old_qid)
 
     def add_arrivals():
-        for p in processes:
-            if p["arrival"] == time:
-                queue_entry_time[p["id"]] = time
-                enqueue(p["id"], p["priority"], reset_proc_time=True, reset_wait_time=True)
-                yield f"ARRIVAL: {p['id']} arrived at TIME {time} → added to Q{p['priority']}"
-
-    def get_next_arrival_time():
-        """Get the time of the next process arrival after current time"""
-        future_arrivals = [p["arrival"] for p in processes if p["arrival"] > time and p["id"] not in completed]
-        return min(future_arrivals) if future_arrivals else None
-
-    def get_highest_priority_queue():
-        for qid in [1, 2, 3, 4]:
-            if queues[qid]:
-                return qid
-        return None
+        for p in arrivals.arrivals_at(time):
+            if p["id"] in stats:
+                raise _duplicate_id(p, time)
+            remaining[p["id"]] = p["burst"]
+            stats[p["id"]] = _new_stats(p)
+            initial_priority[p["id"]] = p["priority"]
+            enqueue(p["id"], p["priority"], reset_proc_time=True)
+            if transitions:
+                yield Event(ARRIVAL, time, p["id"], p["priority"])
 
     def get_next_process(qid):
         """Get next process based on queue algorithm"""
-        if qid == 1:
-            # FCFS: First process in queue
-            return queues[qid].popleft()
-        elif qid == 2:
-            # SJF: Process with shortest remaining burst time
-            shortest_pid = min(queues[qid], key=lambda pid: remaining[pid])
-            queues[qid].remove(shortest_pid)
-            return shortest_pid
-        else:
-            # Round Robin for Q3 and Q4
-            return queues[qid].popleft()
+        # FCFS (Q1) and Round Robin (Q3/Q4) take the queue head,
+        # SJF (Q2) takes the process with shortest remaining burst time
+        return queues.pop(qid)
 
     def start_execution(pid):
         """Called when process starts executing"""
@@ -113,35 +544,40 @@ def run_scheduler(processes, quantum=3, aging_threshold=5, demotion_threshold=6,
         if not preemptive_sjf or current_q != 2:
             return False
         # Check if there's a shorter job in Q2
-        if queues[2]:
-            shortest_in_queue = min(queues[2], key=lambda pid: remaining[pid])
-            return remaining[shortest_in_queue] < remaining[current_pid]
-        return False
+        shortest = queues.shortest_remaining()
+        return shortest is not None and shortest < remaining[current_pid]
 
-    while len(completed) < len(processes):
+    if profiler is not None:
+        profiler.attach(queues)
+        add_arrivals = profiler.timed_steps("add_arrivals", add_arrivals)
+        apply_aging = profiler.timed_steps("apply_aging", apply_aging)
+        get_next_process = profiler.timed("get_next_process", get_next_process)
+        start_execution = profiler.timed("wait_accounting", start_execution)
+        pause_execution = profiler.timed("wait_accounting", pause_execution)
+        should_preempt_sjf = profiler.timed("should_preempt_sjf", should_preempt_sjf)
+
+    # Run until every process has arrived and the queues have drained
+    while queues or not arrivals.exhausted():
         # FIRST: Process arrivals
         yield from add_arrivals()
         
-        # SECOND: Update waiting times
-        update_waiting()
-        
-        # THIRD: Apply aging
+        # SECOND: Apply aging
         yield from apply_aging()
 
-        current_q = get_highest_priority_queue()
+        current_q = queues.highest()
         if not current_q:
             # Optimize: Jump to next arrival time instead of incrementing by 1
-            next_arrival = get_next_arrival_time()
-            if next_arrival is not None:
-                yield f"TIME {time}: CPU IDLE → jumping to TIME {next_arrival}"
-                time = next_arrival
-            else:
-                yield f"TIME {time}: CPU IDLE (no more processes)"
-                time += 1
+            next_arrival = arrivals.next_arrival_time()
+            if transitions:
+                yield Event(IDLE, time, until=next_arrival)
+            time = next_arrival
             continue
 
         pid = get_next_process(current_q)
         start_execution(pid)
+        if transitions:
+            yield Event(DISPATCH, time, pid, current_q, remaining[pid], proc_time[pid])
+        start = time
         used_time = 0
 
         # Queue 1 (FCFS): Run to completion
@@ -158,22 +594,18 @@ def run_scheduler(processes, quantum=3, aging_threshold=5, demotion_threshold=6,
                 # FIRST: Process arrivals
                 yield from add_arrivals()
                 
-                # SECOND: Update waiting times
-                update_waiting(running_pid=pid)
-                
-                # THIRD: Apply aging
+                # SECOND: Apply aging
                 yield from apply_aging()
 
-                algo = "FCFS" if current_q == 1 else ("SJF-P" if preemptive_sjf else "SJF")
-                yield f"TIME {time}: RUN {pid} | Remaining={remaining[pid]} | Q{current_q} ({algo}) | PT={proc_time[pid]}"
+                if ticks:
+                    yield Event(RUN, time, pid, current_q, remaining[pid], proc_time[pid])
 
                 # Check for preemption in SJF
                 if should_preempt_sjf(pid, current_q):
                     pause_execution(pid)
-                    queues[current_q].append(pid)
-                    wait_time[pid] = 0
-                    queue_entry_time[pid] = time
-                    yield f"PREEMPTION: {pid} preempted in Q{current_q} (shorter job arrived)"
+                    queues.push(pid, current_q, time)
+                    if transitions:
+                        yield Event(PREEMPTION, time, pid, current_q, remaining[pid], proc_time[pid])
                     break
 
                 if remaining[pid] == 0:
@@ -189,48 +621,506 @@ def run_scheduler(processes, quantum=3, aging_threshold=5, demotion_threshold=6,
                 # FIRST: Process arrivals
                 yield from add_arrivals()
                 
-                # SECOND: Update waiting times
-                update_waiting(running_pid=pid)
-                
-                # THIRD: Apply aging
+                # SECOND: Apply aging
                 yield from apply_aging()
 
-                yield f"TIME {time}: RUN {pid} | Remaining={remaining[pid]} | Q={current_q} (RR) | PT={proc_time[pid]}"
+                if ticks:
+                    yield Event(RUN, time, pid, current_q, remaining[pid], proc_time[pid])
 
                 if remaining[pid] == 0:
                     break
 
+        if transitions:
+            yield Event(SEGMENT, start, pid, current_q, until=time)
+
         if remaining[pid] == 0:
-            completed.add(pid)
             stats[pid]["completion_time"] = time
-            wait_time[pid] = 0
             proc_time[pid] = 0
-            queue_entry_time[pid] = -1
-            yield f"PROCESS {pid} completed at TIME {time}"
+            if sink is not None:
+                _retire(pid, stats, initial_priority, sink)
+                del remaining[pid], proc_time[pid], priority[pid]
+            if transitions:
+                yield Event(COMPLETION, time, pid, current_q)
         elif current_q >= 3 and used_time >= quantum:
             # Only Q3 and Q4 use quantum and can be demoted
             pause_execution(pid)
             if proc_time[pid] >= demotion_threshold and current_q < 4:
                 new_q = current_q + 1
-                queues[new_q].append(pid)
+                queues.push(pid, new_q, time)
                 priority[pid] = new_q
                 proc_time[pid] = 0
-                wait_time[pid] = 0
-                queue_entry_time[pid] = time
-                yield f"DEMOTION: {pid} demoted from Q{current_q} → Q{new_q} (PT reached {demotion_threshold})"
+                if transitions:
+                    yield Event(DEMOTION, time, pid, new_q, from_queue=current_q)
             else:
                 # Finished quantum but not demoted → back to end of same queue
-                queues[current_q].append(pid)
-                wait_time[pid] = 0
-                queue_entry_time[pid] = time
-                yield f"{pid} quantum expired → back to Q{current_q}"
-    
-    # Calculate final statistics
-    for pid, s in stats.items():
-        if s["completion_time"] is not None:
-            s["turnaround_time"] = s["completion_time"] - s["arrival_time"]
-            s["waiting_time"] = s["total_waiting_time"]
-            s["response_time"] = s["first_response_time"] - s["arrival_time"] if s["first_response_time"] else 0
+                queues.push(pid, current_q, time)
+                if transitions:
+                    yield Event(REQUEUE, time, pid, current_q)
     
     # Return statistics at the end
-    yield ("STATS", stats)
\ No newline at end of file
+    yield ("STATS", _final_stats(stats, processes, initial_priority, stats_format))
+
+
+class EventScheduler:
+    """The discrete-event engine, with its state held on the object so a run
+    can stop at any simulated time, be snapshotted and resumed later.
+
+    Between two interesting instants (arrival, aging deadline, end of the
+    current run) nothing but the running process changes, so those ticks are
+    skipped; at ``TRACE_TICKS`` only their RUN events are produced.  Every
+    other step mirrors the tick engine so both give the same schedule and
+    statistics.
+
+    ``run(until=T)`` stops once simulated time reaches T, in the middle of a
+    run if need be; ``snapshot()`` then captures the full state as plain
+    data and ``EventScheduler.resume`` continues it, possibly in another
+    process and with different parameters.  ``iter_events(engine="event")``
+    is a single uninterrupted ``run``.
+    """
+
+    def __init__(self, processes, quantum=3, aging_threshold=5, demotion_threshold=6, preemptive_sjf=True):
+        self.processes = processes
+        self.arrivals = processes if isinstance(processes, ArrivalCursor) else ArrivalCursor(processes)
+        self.quantum = quantum
+        self.aging_threshold = aging_threshold
+        self.demotion_threshold = demotion_threshold
+        self.preemptive_sjf = preemptive_sjf
+        self.remaining = {}
+        self.queues = ReadyQueues(self.remaining, aging_threshold)
+        self.initial_priority = {}
+        self.proc_time = {}
+        self.stats = {}
+        self.time = 0
+        # (pid, queue, start, end) of a run interrupted by `until`, else None
+        self.running = None
+        # Start of an idle gap interrupted by `until`, else None
+        self.idle_since = None
+
+    def finished(self):
+        return self.running is None and not self.queues and self.arrivals.exhausted()
+
+    def run(self, trace=TRACE_TRANSITIONS, until=None, stats_format="dict", profiler=None, sink=None):
+        """Yield events until the simulation ends, or until simulated time reaches `until`.
+
+        The final ``("STATS", stats)`` is only yielded when the simulation
+        ends.  A run that is still executing at `until` is split there and
+        picks up where it left off on the next call.  A ``profiler`` sees
+        every transition whatever the trace level; a ``sink`` receives (and
+        takes out of memory) each process that completes during this call.
+        """
+        if profiler is None:
+            return self._run(trace, until, stats_format, None, sink)
+        return profiler.observe(self._run(max(trace, TRACE_TRANSITIONS), until, stats_format, profiler, sink),
+                                trace)
+
+    def _run(self, trace, until, stats_format, profiler, sink):
+        transitions = trace >= TRACE_TRANSITIONS
+        ticks = trace >= TRACE_TICKS
+        arrivals = self.arrivals
+        queues = self.queues
+        remaining = self.remaining
+        initial_priority = self.initial_priority
+        proc_time = self.proc_time
+        stats = self.stats
+        quantum = self.quantum
+        demotion_threshold = self.demotion_threshold
+        preemptive_sjf = self.preemptive_sjf
+
+        time = self.time
+
+        def enqueue(pid, qid, reset_proc_time=False):
+            queues.push(pid, qid, time)
+            if reset_proc_time:
+                proc_time[pid] = 0
+            stats[pid]["last_wait_start"] = time
+
+        def add_arrivals():
+            for p in arrivals.arrivals_at(time):
+                if p["id"] in stats:
+                    raise _duplicate_id(p, time)
+                remaining[p["id"]] = p["burst"]
+                stats[p["id"]] = _new_stats(p)
+                initial_priority[p["id"]] = p["priority"]
+                enqueue(p["id"], p["priority"], reset_proc_time=True)
+                if transitions:
+                    yield Event(ARRIVAL, time, p["id"], p["priority"])
+
+        def apply_aging():
+            for pid, old_qid in queues.due_for_aging(time):
+                new_qid = old_qid - 1
+                queues.push(pid, new_qid, time)
+                stats[pid]["last_wait_start"] = time
+                if transitions:
+                    yield Event(AGING, time, pid, new_qid, from_queue=old_qid)
+
+        def start_execution(pid):
+            if stats[pid]["first_response_time"] is None:
+                stats[pid]["first_response_time"] = time
+            if stats[pid]["last_wait_start"] is not None:
+                stats[pid]["total_waiting_time"] += (time - stats[pid]["last_wait_start"])
+                stats[pid]["last_wait_start"] = None
+
+        def pause_execution(pid):
+            stats[pid]["last_wait_start"] = time
+
+        def should_preempt_sjf(current_pid, current_q):
+            if not preemptive_sjf or current_q != 2:
+                return False
+            shortest = queues.shortest_remaining()
+            return shortest is not None and shortest < remaining[current_pid]
+
+        get_next_process = queues.pop
+        if profiler is not None:
+            profiler.attach(queues)
+            add_arrivals = profiler.timed_steps("add_arrivals", add_arrivals)
+            apply_aging = profiler.timed_steps("apply_aging", apply_aging)
+            get_next_process = profiler.timed("get_next_process", get_next_process)
+            start_execution = profiler.timed("wait_accounting", start_execution)
+            pause_execution = profiler.timed("wait_accounting", pause_execution)
+            should_preempt_sjf = profiler.timed("should_preempt_sjf", should_preempt_sjf)
+
+        while self.running is not None or queues or not arrivals.exhausted():
+            if self.running is not None:
+                # Resuming a run that was split at the previous `until`
+                pid, current_q, start, end = self.running
+                self.running = None
+            else:
+                if until is not None and time >= until:
+                    break
+                yield from add_arrivals()
+                yield from apply_aging()
+
+                current_q = queues.highest()
+                if not current_q:
+                    next_arrival = arrivals.next_arrival_time()
+                    if self.idle_since is None:
+                        self.idle_since = time
+                    if until is not None and until < next_arrival:
+                        # Stop inside the idle gap; the resumed run reports all of it
+                        time = until
+                        break
+                    if transitions:
+                        yield Event(IDLE, self.idle_since, until=next_arrival)
+                    self.idle_since = None
+                    time = next_arrival
+                    continue
+
+                pid = get_next_process(current_q)
+                start_execution(pid)
+                if transitions:
+                    yield Event(DISPATCH, time, pid, current_q, remaining[pid], proc_time[pid])
+                start = time
+
+                # Q1/Q2 run to completion (unless SJF preemption kicks in), Q3/Q4 get one quantum
+                if current_q in [1, 2]:
+                    end = time + remaining[pid]
+                else:
+                    end = time + min(remaining[pid], quantum)
+
+            preempted = False
+            while time < end:
+                # Jump to the next instant where something besides the running process changes
+                stop = end
+                next_arrival = arrivals.next_arrival_time()
+                if next_arrival is not None and next_arrival < stop:
+                    stop = next_arrival
+                next_aging = queues.next_deadline()
+                if next_aging is not None and next_aging < stop:
+                    stop = next_aging
+                if until is not None and time < until < stop:
+                    stop = until
+
+                if ticks:
+                    left, pt = remaining[pid], proc_time[pid]
+                    for at in range(time + 1, stop):
+                        yield Event(RUN, at, pid, current_q, left - (at - time), pt + (at - time))
+
+                remaining[pid] -= stop - time
+                proc_time[pid] += stop - time
+                time = stop
+
+                yield from add_arrivals()
+                yield from apply_aging()
+                if ticks:
+                    yield Event(RUN, time, pid, current_q, remaining[pid], proc_time[pid])
+
+                # Only a newly queued Q2 job can undercut the running one, and queues
+                # change only at these instants, so skipped ticks never preempt
+                if should_preempt_sjf(pid, current_q):
+                    pause_execution(pid)
+                    queues.push(pid, current_q, time)
+                    if transitions:
+                        yield Event(PREEMPTION, time, pid, current_q, remaining[pid], proc_time[pid])
+                    preempted = True
+                    break
+
+                if until is not None and time >= until and time < end:
+                    break
+
+            if not preempted and time < end:
+                self.running = (pid, current_q, start, end)
+                break
+
+            used_time = time - start
+            if transitions:
+                yield Event(SEGMENT, start, pid, current_q, until=time)
+
+            if remaining[pid] == 0:
+                stats[pid]["completion_time"] = time
+                proc_time[pid] = 0
+                if sink is not None:
+                    _retire(pid, stats, initial_priority, sink)
+                    del remaining[pid], proc_time[pid]
+                if transitions:
+                    yield Event(COMPLETION, time, pid, current_q)
+            elif current_q >= 3 and used_time >= quantum:
+                pause_execution(pid)
+                if proc_time[pid] >= demotion_threshold and current_q < 4:
+                    new_q = current_q + 1
+                    queues.push(pid, new_q, time)
+                    proc_time[pid] = 0
+                    if transitions:
+                        yield Event(DEMOTION, time, pid, new_q, from_queue=current_q)
+                else:
+                    queues.push(pid, current_q, time)
+                    if transitions:
+                        yield Event(REQUEUE, time, pid, current_q)
+
+        self.time = time
+        if self.finished():
+            yield ("STATS", _final_stats(stats, self.processes, initial_priority, stats_format))
+
+    def snapshot(self):
+        """The full scheduler state as plain, JSON-serializable data.
+
+        Arrivals are recorded as a count: resuming needs the same workload
+        again, and skips the processes that had already arrived.
+        """
+        queues = self.queues
+        return {
+            "version": SNAPSHOT_VERSION,
+            "params": {
+                "quantum": self.quantum,
+                "aging_threshold": self.aging_threshold,
+                "demotion_threshold": self.demotion_threshold,
+                "preemptive_sjf": self.preemptive_sjf,
+            },
+            "time": self.time,
+            "arrived": self.arrivals.handed_out,
+            "running": list(self.running) if self.running is not None else None,
+            "idle_since": self.idle_since,
+            "processes": [
+                [pid, self.remaining[pid], self.proc_time[pid], self.initial_priority[pid], self.stats[pid]]
+                for pid in self.stats
+            ],
+            "queues": {
+                "seq": queues.seq,
+                "location": [[pid, qid, seq] for pid, (qid, seq) in queues.location.items()],
+                "fifo": {str(qid): [list(e) for e in entries if queues.location.get(e[1]) == (qid, e[0])]
+                         for qid, entries in queues.fifo.items()},
+                "sjf": [list(e) for e in queues.sjf if queues.location.get(e[2]) == (2, e[1])],
+                "deadlines": [list(e) for e in queues.deadlines if queues._deadline_is_live(e)],
+            },
+        }
+
+    @classmethod
+    def resume(cls, snapshot, processes, **params):
+        """Rebuild a scheduler from `snapshot` over the same workload `processes`.
+
+        Keyword arguments (quantum, aging_threshold, demotion_threshold,
+        preemptive_sjf) override the snapshot's parameters from its time on.
+        A round-robin slice in progress is re-cut to the new quantum (ending
+        at once if it already ran that long); queued processes keep the
+        aging deadlines they were given before the snapshot.
+        """
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {snapshot.get('version')!r}")
+        unknown = set(params) - set(snapshot["params"])
+        if unknown:
+            raise ValueError(f"Unknown scheduler parameters: {', '.join(sorted(unknown))}")
+        merged = dict(snapshot["params"], **params)
+        if merged["quantum"] < 1 or merged["aging_threshold"] < 1:
+            raise ValueError("quantum and aging_threshold must be at least 1")
+
+        scheduler = cls(processes, **merged)
+        scheduler.arrivals.skip(snapshot["arrived"])
+        scheduler.time = snapshot["time"]
+        for pid, remaining, proc_time, priority, stats in snapshot["processes"]:
+            scheduler.remaining[pid] = remaining
+            scheduler.proc_time[pid] = proc_time
+            scheduler.initial_priority[pid] = priority
+            scheduler.stats[pid] = dict(stats)
+        if snapshot["running"] is not None:
+            pid, qid, start, end = snapshot["running"]
+            if qid >= 3:
+                burst_left_at_start = scheduler.remaining[pid] + scheduler.time - start
+                end = max(start + min(burst_left_at_start, scheduler.quantum), scheduler.time)
+            scheduler.running = (pid, qid, start, end)
+        # Absent from snapshots taken before idle gaps were carried over
+        scheduler.idle_since = snapshot.get("idle_since")
+
+        queues = scheduler.queues
+        state = snapshot["queues"]
+        queues.seq = state["seq"]
+        for pid, qid, seq in state["location"]:
+            queues.location[pid] = (qid, seq)
+            queues.size[qid] += 1
+        for qid, entries in state["fifo"].items():
+            queues.fifo[int(qid)].extend(tuple(e) for e in entries)
+        queues.sjf = [tuple(e) for e in state["sjf"]]
+        heapify(queues.sjf)
+        queues.deadlines = [tuple(e) for e in state["deadlines"]]
+        heapify(queues.deadlines)
+        return scheduler
+
+
+def save_snapshot(snapshot, path):
+    with open(path, "w") as f:
+        json.dump(snapshot, f)
+
+
+def load_snapshot(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _run_compact_engine(processes, quantum, aging_threshold, demotion_threshold, preemptive_sjf, trace,
+                        stats_format):
+    """The event engine over dense integer process indices.
+
+    Each process gets the next index when it arrives, and all per-process
+    state lives in flat ``array`` columns instead of per-pid dicts and a
+    stats dict per process.  String ids are only looked up to build events
+    and the final stats.  The schedule and statistics are identical to the
+    event engine.
+    """
+    transitions = trace >= TRACE_TRANSITIONS
+    ticks = trace >= TRACE_TICKS
+    if not isinstance(processes, ArrivalCursor):
+        # Checked up front: keeping a set of every id during the run would undo the compact state
+        seen = set()
+        for p in processes:
+            if p["id"] in seen:
+                raise _duplicate_id(p, p["arrival"])
+            seen.add(p["id"])
+        del seen
+    arrivals = processes if isinstance(processes, ArrivalCursor) else ArrivalCursor(processes)
+    # A list already holds the id strings; streamed ids are packed instead of kept as strings
+    ids = _PackedIds() if isinstance(processes, ArrivalCursor) else []
+    columns = _CompactColumns()
+    remaining = columns.remaining
+    proc_time = columns.proc_time
+    first_response = columns.first_response_time
+    completion = columns.completion_time
+    total_wait = columns.total_waiting_time
+    wait_start = columns.last_wait_start
+    queues = ReadyQueues(remaining, aging_threshold)
+
+    time = 0
+
+    def add_arrivals():
+        for p in arrivals.arrivals_at(time):
+            i = len(ids)
+            ids.append(p["id"])
+            columns.append(p["arrival"], p["burst"], p["priority"])
+            queues.push(i, p["priority"], time)
+            wait_start[i] = time
+            if transitions:
+                yield Event(ARRIVAL, time, p["id"], p["priority"])
+
+    def apply_aging():
+        for i, old_qid in queues.due_for_aging(time):
+            queues.push(i, old_qid - 1, time)
+            wait_start[i] = time
+            if transitions:
+                yield Event(AGING, time, ids[i], old_qid - 1, from_queue=old_qid)
+
+    while queues or not arrivals.exhausted():
+        # Only enter the arrival and aging steps when something is due (they are no-ops otherwise)
+        next_arrival = arrivals.next_arrival_time()
+        if next_arrival is not None and next_arrival <= time:
+            yield from add_arrivals()
+        next_aging = queues.next_deadline()
+        if next_aging is not None and next_aging <= time:
+            yield from apply_aging()
+
+        current_q = queues.highest()
+        if not current_q:
+            next_arrival = arrivals.next_arrival_time()
+            if transitions:
+                yield Event(IDLE, time, until=next_arrival)
+            time = next_arrival
+            continue
+
+        i = queues.pop(current_q)
+        if first_response[i] < 0:
+            first_response[i] = time
+        if wait_start[i] >= 0:
+            total_wait[i] += time - wait_start[i]
+            wait_start[i] = -1
+        if transitions:
+            yield Event(DISPATCH, time, ids[i], current_q, remaining[i], proc_time[i])
+        start = time
+
+        if current_q <= 2:
+            end = time + remaining[i]
+        else:
+            end = time + min(remaining[i], quantum)
+
+        while time < end:
+            stop = end
+            next_arrival = arrivals.next_arrival_time()
+            if next_arrival is not None and next_arrival < stop:
+                stop = next_arrival
+            next_aging = queues.next_deadline()
+            if next_aging is not None and next_aging < stop:
+                stop = next_aging
+
+            if ticks:
+                pid, left, pt = ids[i], remaining[i], proc_time[i]
+                for at in range(time + 1, stop):
+                    yield Event(RUN, at, pid, current_q, left - (at - time), pt + (at - time))
+
+            remaining[i] -= stop - time
+            proc_time[i] += stop - time
+            time = stop
+
+            # New arrivals only schedule future deadlines, so next_aging is still accurate
+            if stop == next_arrival:
+                yield from add_arrivals()
+            if stop == next_aging:
+                yield from apply_aging()
+            if ticks:
+                yield Event(RUN, time, ids[i], current_q, remaining[i], proc_time[i])
+
+            if preemptive_sjf and current_q == 2:
+                shortest = queues.shortest_remaining()
+                if shortest is not None and shortest < remaining[i]:
+                    wait_start[i] = time
+                    queues.push(i, current_q, time)
+                    if transitions:
+                        yield Event(PREEMPTION, time, ids[i], current_q, remaining[i], proc_time[i])
+                    break
+
+        used_time = time - start
+        if transitions:
+            yield Event(SEGMENT, start, ids[i], current_q, until=time)
+
+        if remaining[i] == 0:
+            completion[i] = time
+            proc_time[i] = 0
+            if transitions:
+                yield Event(COMPLETION, time, ids[i], current_q)
+        elif current_q >= 3 and used_time >= quantum:
+            wait_start[i] = time
+            if proc_time[i] >= demotion_threshold and current_q < 4:
+                queues.push(i, current_q + 1, time)
+                proc_time[i] = 0
+                if transitions:
+                    yield Event(DEMOTION, time, ids[i], current_q + 1, from_queue=current_q)
+            else:
+                queues.push(i, current_q, time)
+                if transitions:
+                    yield Event(REQUEUE, time, ids[i], current_q)
+
+    yield ("STATS", columns.final_stats(ids, processes, stats_format))
@@ -0,0 +1,168 @@
+"""Monte Carlo comparison of scheduler configurations on generated workloads.
+
+Usage:
+    python mlq_montecarlo.py --processes 5000 --arrival bursty --burst pareto --quantum 2 4 8 --replications 40
+
+Every replication draws a fresh workload with ``mlq_generate.generate``
+from its own seed (spawned from ``--seed``, so results are reproducible
+whatever the number of workers) and runs every configuration of the grid
+on it.  Reported are the mean over replications of each configuration's
+average TAT/WT/RT with a Student-t confidence interval, and, as all
+configurations see the same workloads, paired differences against the
+first configuration, which are much tighter than comparing two intervals.
+Replications are spread over worker processes with ``mlq_sweep.run_parallel``.
+"""
+import argparse
+import csv
+import functools
+import json
+import math
+import sys
+from statistics import NormalDist
+
+import numpy as np
+
+from mlq_generate import ARRIVALS, BURSTS, generate
+from mlq_logic import ENGINES
+from mlq_sweep import METRICS, PARAMETERS, expand_grid, parse_bool, print_table, run_config, run_parallel
+
+
+def t_quantile(p, df):
+    """Quantile `p` of Student's t distribution with `df` degrees of freedom"""
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    # Cornish-Fisher expansion around the normal quantile (Abramowitz & Stegun 26.7.5)
+    z = NormalDist().inv_cdf(p)
+    g1 = (z ** 3 + z) / 4
+    g2 = (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96
+    g3 = (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384
+    g4 = (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / 92160
+    return z + g1 / df + g2 / df ** 2 + g3 / df ** 3 + g4 / df ** 4
+
+
+def confidence_interval(values, confidence=0.95):
+    """Mean of `values` and the half-width of its two-sided t confidence interval"""
+    values = np.asarray(values, dtype=float)
+    mean = float(values.mean()) if len(values) else 0.0
+    if len(values) < 2:
+        return mean, math.inf
+    sem = float(values.std(ddof=1)) / math.sqrt(len(values))
+    return mean, t_quantile((1 + confidence) / 2, len(values) - 1) * sem
+
+
+def run_replication(workload_params, configs, seed, engine="event"):
+    """Generate one workload from `seed` and return the (TAT, WT, RT) averages of every configuration"""
+    processes = generate(seed=seed, **workload_params).processes()
+    return [run_config(processes, params, engine) for params in configs]
+
+
+def monte_carlo(grid, workload_params, replications=30, seed=0, workers=None, engine="event", confidence=0.95):
+    """Run every configuration of `grid` on `replications` generated workloads.
+
+    ``workload_params`` are keyword arguments for ``generate`` (without
+    ``seed``).  Returns ``(rows, samples)``: one row per configuration, in
+    grid order, with the parameter values, the mean of ``avg_tat``,
+    ``avg_wt`` and ``avg_rt`` over replications and the half-width of each
+    confidence interval (``avg_tat_ci`` ...); ``samples`` is an array of
+    shape (replications, configurations, 3) for further analysis.
+    """
+    if replications < 2:
+        raise ValueError("At least 2 replications are needed for a confidence interval")
+    configs = expand_grid(grid)
+    seeds = np.random.SeedSequence(seed).spawn(replications)
+    results = run_parallel(functools.partial(run_replication, engine=engine), seeds, (workload_params, configs),
+                           workers)
+
+    samples = np.asarray(results, dtype=float)
+    rows = []
+    for index, params in enumerate(configs):
+        row = dict(params)
+        for column, metric in enumerate(METRICS):
+            row[metric], row[f"{metric}_ci"] = confidence_interval(samples[:, index, column], confidence)
+        rows.append(row)
+    return rows, samples
+
+
+def compare(rows, samples, baseline=0, confidence=0.95):
+    """Paired differences (configuration minus `baseline`) of every metric, with confidence intervals.
+
+    A difference is ``significant`` when its interval excludes zero.
+    """
+    comparisons = []
+    for index, params in enumerate(rows):
+        row = {name: params[name] for name in PARAMETERS if name in params}
+        for column, metric in enumerate(METRICS):
+            difference, half_width = confidence_interval(
+                samples[:, index, column] - samples[:, baseline, column], confidence)
+            row[f"{metric}_diff"] = difference
+            row[f"{metric}_diff_ci"] = half_width
+            row[f"{metric}_significant"] = index != baseline and abs(difference) > half_width
+        comparisons.append(row)
+    return comparisons
+
+
+def _print_table(rows, names, suffix=""):
+    def cells(row):
+        formatted = []
+        for metric in METRICS:
+            mean, half_width = row[metric + suffix], row[metric + suffix + "_ci"]
+            mark = "*" if row.get(metric + "_significant") else " "
+            formatted.append(f"{mean:>11.2f} ± {half_width:<7.2f}{mark}")
+        return formatted
+
+    print_table(rows, names, [metric + suffix for metric in METRICS], cells, width=22)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare MLFQ configurations over generated workloads.")
+    parser.add_argument("--processes", type=int, default=2000, help="processes per workload")
+    parser.add_argument("--arrival", choices=ARRIVALS, default="poisson")
+    parser.add_argument("--rate", type=float, default=0.2, help="mean arrivals per time unit")
+    parser.add_argument("--burst", choices=BURSTS, default="exponential")
+    parser.add_argument("--mean-burst", type=float, default=4.0)
+    parser.add_argument("--shape", type=float, help="Pareto tail index or lognormal sigma")
+    parser.add_argument("--priorities", type=float, nargs=4, default=(0.25, 0.25, 0.25, 0.25),
+                        metavar=("Q1", "Q2", "Q3", "Q4"), help="weights of the initial queues")
+    parser.add_argument("--burst-size", type=float, default=8.0, help="mean clump size of bursty arrivals")
+    parser.add_argument("--spread", type=float, default=0.0, help="mean gap inside a bursty clump")
+    parser.add_argument("--quantum", type=int, nargs="+")
+    parser.add_argument("--aging-threshold", type=int, nargs="+")
+    parser.add_argument("--demotion-threshold", type=int, nargs="+")
+    parser.add_argument("--preemptive-sjf", type=parse_bool, nargs="+")
+    parser.add_argument("--replications", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all CPUs)")
+    parser.add_argument("--engine", choices=ENGINES, default="event")
+    parser.add_argument("--format", choices=["table", "csv", "json"], default="table")
+    args = parser.parse_args(argv)
+
+    workload_params = {"n": args.processes, "arrival": args.arrival, "rate": args.rate, "burst": args.burst,
+                       "mean_burst": args.mean_burst, "shape": args.shape, "priorities": tuple(args.priorities),
+                       "burst_size": args.burst_size, "spread": args.spread}
+    grid = {name: getattr(args, name) for name in PARAMETERS if getattr(args, name) is not None}
+    names = [name for name in PARAMETERS if name in grid]
+
+    rows, samples = monte_carlo(grid, workload_params, args.replications, args.seed, args.workers, args.engine,
+                                args.confidence)
+    comparisons = compare(rows, samples, confidence=args.confidence) if len(rows) > 1 else []
+    if args.format == "json":
+        json.dump({"rows": rows, "compared_to_first": comparisons}, sys.stdout, indent=2)
+        print()
+    elif args.format == "csv":
+        writer = csv.DictWriter(sys.stdout, fieldnames=names + [f"{m}{s}" for m in METRICS for s in ("", "_ci")])
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        print(f"{args.replications} replications of {args.processes} processes, "
+              f"{args.confidence:.0%} confidence intervals")
+        _print_table(rows, names)
+        if comparisons:
+            print("\nPaired difference to the first configuration (* = significant)")
+            _print_table(comparisons, names, "_diff")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Optional instrumentation of the scheduler's hot paths.
+
+Pass a ``Profiler`` to ``run_scheduler`` or ``iter_events`` (tick and event
+engines) to find out where a slow run spends its time:
+
+    profiler = Profiler()
+    *_, (_, stats) = iter_events(processes, trace=TRACE_NONE, profiler=profiler)
+    profiler.dump()
+
+Without a profiler the engines run exactly as before: the phase functions
+are only wrapped with timers when one is given.  The profiler records
+
+- calls and wall time per phase: ``add_arrivals``, ``wait_accounting``
+  (the waiting-time bookkeeping of dispatches and pauses),
+  ``apply_aging``, ``get_next_process``, ``should_preempt_sjf`` and, in
+  ``run_scheduler``, ``format_events``;
+- counts of context switches, preemptions, promotions, demotions, requeues,
+  completions and idle jumps;
+- per-queue length histograms weighted by simulated time, sampled at every
+  dispatch.
+
+Callables in ``hooks`` are called with ``(event, profiler)`` for every
+transition event, whatever the trace level of the run.
+"""
+import sys
+from time import perf_counter
+
+from mlq_events import (
+    Event, RUN, TRACE_TICKS, TRACE_TRANSITIONS,
+    AGING, COMPLETION, DEMOTION, DISPATCH, IDLE, PREEMPTION, REQUEUE,
+)
+
+PHASES = ("add_arrivals", "wait_accounting", "apply_aging", "get_next_process", "should_preempt_sjf",
+          "format_events")
+# Event kind -> counter name
+COUNTED = {
+    DISPATCH: "context_switches",
+    PREEMPTION: "preemptions",
+    AGING: "promotions",
+    DEMOTION: "demotions",
+    REQUEUE: "requeues",
+    COMPLETION: "completions",
+    IDLE: "idle_jumps",
+}
+
+
+class Profiler:
+    """Counters, phase timers and queue-length histograms for one run"""
+
+    def __init__(self, hooks=()):
+        self.hooks = list(hooks)
+        # phase -> [calls, seconds]
+        self.timers = {}
+        self.counts = dict.fromkeys(COUNTED.values(), 0)
+        # qid -> {length: simulated time spent at that length}
+        self.queue_lengths = {qid: {} for qid in (1, 2, 3, 4)}
+        self.queues = None
+        self.wall_time = 0.0
+        self.simulated_time = 0
+        self._last_sample = None
+
+    # ---- engine side ----
+
+    def attach(self, queues):
+        """Called by the engine with its ReadyQueues, so dispatches can sample queue lengths"""
+        self.queues = queues
+
+    def timed(self, phase, function):
+        """Wrap a plain phase function so its calls and time are recorded"""
+        timer = self.timers.setdefault(phase, [0, 0.0])
+
+        def wrapper(*args):
+            timer[0] += 1
+            start = perf_counter()
+            result = function(*args)
+            timer[1] += perf_counter() - start
+            return result
+        return wrapper
+
+    def timed_steps(self, phase, generator_function):
+        """Wrap a generator phase; only its own steps are timed, not the consumer's"""
+        timer = self.timers.setdefault(phase, [0, 0.0])
+
+        def wrapper(*args):
+            timer[0] += 1
+            start = perf_counter()
+            for item in generator_function(*args):
+                timer[1] += perf_counter() - start
+                yield item
+                start = perf_counter()
+            timer[1] += perf_counter() - start
+        return wrapper
+
+    def observe(self, events, trace):
+        """Record the events of a run made at TRACE_TRANSITIONS or above, passing on the ones `trace` asks for"""
+        start = perf_counter()
+        try:
+            for event in events:
+                if isinstance(event, Event):
+                    self.record(event)
+                    if trace < (TRACE_TICKS if event.kind == RUN else TRACE_TRANSITIONS):
+                        continue
+                elif self._last_sample is not None:
+                    # Final stats: account for the queue lengths up to the end of the run
+                    self._sample_queues(self.simulated_time)
+                yield event
+        finally:
+            self.wall_time += perf_counter() - start
+
+    def record(self, event):
+        kind = event.kind
+        if kind == RUN:
+            return
+        if event.time > self.simulated_time:
+            self.simulated_time = event.time
+        counter = COUNTED.get(kind)
+        if counter is not None:
+            self.counts[counter] += 1
+        if kind == DISPATCH and self.queues is not None:
+            self._sample_queues(event.time)
+        for hook in self.hooks:
+            hook(event, self)
+
+    def _sample_queues(self, time):
+        # The lengths seen at the previous dispatch held until now
+        if self._last_sample is not None:
+            since, sizes = self._last_sample
+            if time > since:
+                for qid, size in sizes.items():
+                    histogram = self.queue_lengths[qid]
+                    histogram[size] = histogram.get(size, 0) + (time - since)
+        self._last_sample = (time, dict(self.queues.size))
+
+    # ---- reporting ----
+
+    def summary(self):
+        """All measurements as a plain dict"""
+        phases = {}
+        for phase in PHASES:
+            if phase in self.timers:
+                calls, seconds = self.timers[phase]
+                phases[phase] = {"calls": calls, "seconds": seconds,
+                                 "mean_us": seconds / calls * 1e6 if calls else 0.0}
+        queues = {}
+        for qid, histogram in self.queue_lengths.items():
+            total = sum(histogram.values())
+            queues[qid] = {
+                "mean": sum(size * span for size, span in histogram.items()) / total if total else 0.0,
+                "max": max(histogram, default=0),
+                "histogram": dict(sorted(histogram.items())),
+            }
+        return {
+            "wall_time": self.wall_time,
+            "simulated_time": self.simulated_time,
+            "phases": phases,
+            "counts": dict(self.counts),
+            "queue_lengths": queues,
+        }
+
+    def dump(self, file=None):
+        """Print the summary as a short report"""
+        file = file or sys.stdout
+        summary = self.summary()
+        print(f"Wall time {summary['wall_time']:.3f} s over {summary['simulated_time']} simulated time units",
+              file=file)
+        print(f"{'Phase':<20} {'Calls':>10} {'Total s':>10} {'Mean us':>10} {'Share':>7}", file=file)
+        for phase, timer in summary["phases"].items():
+            share = timer["seconds"] / summary["wall_time"] * 100 if summary["wall_time"] else 0.0
+            print(f"{phase:<20} {timer['calls']:>10} {timer['seconds']:>10.3f} {timer['mean_us']:>10.2f} "
+                  f"{share:>6.1f}%", file=file)
+        print(" ".join(f"{name}={count}" for name, count in summary["counts"].items()), file=file)
+        for qid, queue in summary["queue_lengths"].items():
+            print(f"Q{qid} length: mean {queue['mean']:.2f}, max {queue['max']}", file=file)
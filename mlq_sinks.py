@@ -0,0 +1,262 @@
+"""Streaming sinks for completed processes.
+
+Passed as ``sink=`` to ``iter_events`` or ``EventScheduler.run`` (tick and
+event engines), a sink receives each process's final record the moment it
+completes, after which the engine forgets the process.  Memory then follows
+the number of live processes instead of the length of the trace:
+
+    stats = StreamingStats()
+    with CSVSink("completed.csv") as csv_sink:
+        for event in iter_events(open_trace("jobs.csv"), trace=TRACE_NONE, sink=MultiSink(stats, csv_sink)):
+            pass
+    print(stats.summary())
+
+A record is a dict with the keys in RECORD_FIELDS; ``priority`` is the
+queue the process arrived in.  Any object with ``write(record)`` works as a
+sink; ``close()`` is called by ``with`` blocks and ``MultiSink``.
+"""
+import csv
+import math
+from collections import deque
+
+from mlq_events import METRICS, PERCENTILES, summary_dict
+
+RECORD_FIELDS = ("pid", "arrival_time", "burst_time", "priority", "first_response_time", "completion_time",
+                 "turnaround_time", "waiting_time", "response_time")
+
+
+class Sink:
+    """Mixin for sinks: a no-op ``close`` and context manager support; subclasses provide ``write``"""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CallbackSink(Sink):
+    """Calls ``callback(record)`` for every completed process"""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def write(self, record):
+        self.callback(record)
+
+
+class RingBufferSink(Sink):
+    """Keeps the last `capacity` records, e.g. for a "recently completed" view"""
+
+    def __init__(self, capacity=1000):
+        self.records = deque(maxlen=capacity)
+
+    def write(self, record):
+        self.records.append(record)
+
+
+class MultiSink(Sink):
+    """Forwards every record to each of `sinks`, in order"""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def write(self, record):
+        for sink in self.sinks:
+            sink.write(record)
+
+    def close(self):
+        for sink in self.sinks:
+            close = getattr(sink, "close", None)
+            if close is not None:
+                close()
+
+
+class CSVSink(Sink):
+    """Appends records to a CSV file (or open text file) with a RECORD_FIELDS header.
+
+    Rows are buffered and written `flush_every` at a time.
+    """
+
+    def __init__(self, file, flush_every=1024):
+        if isinstance(file, str):
+            self.file = open(file, "w", newline="")
+            self.owned = True
+        else:
+            self.file = file
+            self.owned = False
+        self.writer = csv.writer(self.file, lineterminator="\n")
+        self.writer.writerow(RECORD_FIELDS)
+        self.flush_every = flush_every
+        self.rows = []
+
+    def write(self, record):
+        self.rows.append([record[name] for name in RECORD_FIELDS])
+        if len(self.rows) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self.writer.writerows(self.rows)
+        self.rows.clear()
+
+    def close(self):
+        self.flush()
+        if self.owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+class ParquetSink(Sink):
+    """Writes records to a Parquet file in row groups of `row_group_size` (needs pyarrow)"""
+
+    def __init__(self, path, row_group_size=65536):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("ParquetSink needs pyarrow (pip install pyarrow)") from None
+        self.pa = pyarrow
+        schema = pyarrow.schema([("pid", pyarrow.string())] +
+                                [(name, pyarrow.int64()) for name in RECORD_FIELDS[1:]])
+        self.writer = pyarrow.parquet.ParquetWriter(path, schema)
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.columns = {name: [] for name in RECORD_FIELDS}
+        self.buffered = 0
+
+    def write(self, record):
+        for name, column in self.columns.items():
+            column.append(record[name])
+        self.buffered += 1
+        if self.buffered >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffered:
+            columns = dict(self.columns, pid=[str(pid) for pid in self.columns["pid"]])
+            self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+            for column in self.columns.values():
+                column.clear()
+            self.buffered = 0
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+class QuantileSketch:
+    """Streaming quantiles with bounded relative error (DDSketch-style).
+
+    Positive values fall into logarithmic buckets ``gamma**(i-1) < v <=
+    gamma**i``; every estimate is within ``relative_accuracy`` of a true
+    value of the requested rank, and memory grows only with the logarithm
+    of the value range.  Zero and negative values are counted exactly as 0.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if value <= 0:
+            self.zeros += 1
+        else:
+            index = math.ceil(math.log(value) / self.log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other):
+        """Fold in a sketch built with the same relative accuracy"""
+        if other.gamma != self.gamma:
+            raise ValueError("Can only merge sketches with the same relative accuracy")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Estimate of the q-quantile (0 <= q <= 1), or 0.0 when empty"""
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        if rank < self.zeros:
+            return 0.0
+        # The first and last ranks are the tracked extremes, so p0/p100 are exact
+        if rank < 1:
+            return float(self.min)
+        if rank >= self.count - 1:
+            return float(self.max)
+        seen = self.zeros
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                estimate = 2 * self.gamma ** index / (self.gamma + 1)
+                # The bucket's midpoint may lie beyond the extremes it was filled from
+                return float(min(max(estimate, self.min), self.max))
+        return float(self.max)
+
+
+class StreamingStats(Sink):
+    """Incremental count, mean, max and quantile sketch of TAT, WT and RT.
+
+    ``summary()`` has the shape of ``ProcessStats.summary()``, with the
+    percentiles estimated by a ``QuantileSketch``.  Per initial priority
+    class aggregates are kept as well (``by_priority()``).
+    """
+
+    def __init__(self, relative_accuracy=0.01, per_priority=True):
+        self.relative_accuracy = relative_accuracy
+        self.count = 0
+        self.sums = dict.fromkeys(METRICS, 0)
+        self.sketches = {metric: QuantileSketch(relative_accuracy) for metric in METRICS}
+        self.priorities = {} if per_priority else None
+
+    def write(self, record):
+        self.count += 1
+        for metric in METRICS:
+            value = record[metric]
+            self.sums[metric] += value
+            self.sketches[metric].add(value)
+        if self.priorities is not None:
+            by_queue = self.priorities.get(record["priority"])
+            if by_queue is None:
+                by_queue = self.priorities[record["priority"]] = StreamingStats(self.relative_accuracy, False)
+            by_queue.write(record)
+
+    def summary(self):
+        def describe(metric):
+            sketch = self.sketches[metric]
+            return self.sums[metric] / self.count, [sketch.quantile(p / 100) for p in PERCENTILES], sketch.max
+
+        return summary_dict(self.count, describe)
+
+    def by_priority(self):
+        """``summary()`` for each initial priority class, keyed by queue number"""
+        if self.priorities is None:
+            return {}
+        return {qid: self.priorities[qid].summary() for qid in sorted(self.priorities)}
+
+    def averages(self):
+        """Average (TAT, WT, RT) over completed processes"""
+        if not self.count:
+            return (0.0, 0.0, 0.0)
+        return tuple(self.sums[metric] / self.count for metric in METRICS)
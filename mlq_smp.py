@@ -0,0 +1,336 @@
+"""Multi-core (SMP) scheduling.
+
+``simulate_smp`` applies the MLFQ rules of ``mlq_logic`` to N cores:
+
+- ``mode="global"``: one shared set of Q1-Q4 queues.  Whenever a core is
+  free it takes the process a single CPU would dispatch next, preferring
+  the core that process last ran on.
+- ``mode="per-core"``: every core has its own Q1-Q4.  An arriving process
+  goes to the least loaded core (queued plus running), and ``balance``
+  decides how queued processes move between cores: ``"steal"`` lets a core
+  with nothing to run take the next process of the busiest core,
+  ``"periodic"`` evens out the loads every ``balance_interval`` time units.
+
+Arrivals, aging, demotion, round-robin slices and SJF preemption follow
+the single-CPU engines (in global mode a shorter Q2 job preempts the
+running Q2 job with the most burst left), and with ``cores=1`` both modes
+give exactly the schedule of ``mlq_logic.simulate``.  Time jumps from one
+interesting instant to the next and each instant only touches the cores
+something happens on, so 64 or more cores cost little more than one.
+
+    stats, cores = simulate_smp(processes, cores=8, mode="per-core", balance="steal")
+    for core in cores:
+        print(core["core"], f"{core['utilization']:.0%}", core["migrations"])
+"""
+from heapq import heappush, heappop
+
+from mlq_events import Timeline
+from mlq_logic import STATS_FORMATS, ArrivalCursor, ReadyQueues, _duplicate_id, _final_stats, _new_stats
+
+SMP_MODES = ("global", "per-core")
+BALANCERS = ("steal", "periodic")
+
+
+class SMPScheduler:
+    """State of one multi-core run; ``run()`` simulates it to the end.
+
+    After the run ``core_summary()`` reports, per core, the time spent
+    running, utilization over the whole run, dispatches, completions,
+    migrations (dispatches of a process that last ran on another core),
+    processes moved in by load balancing, and a ``Timeline``.
+    """
+
+    def __init__(self, processes, cores=4, mode="global", balance="steal", balance_interval=10, quantum=3,
+                 aging_threshold=5, demotion_threshold=6, preemptive_sjf=True):
+        if cores < 1:
+            raise ValueError("cores must be at least 1")
+        if mode not in SMP_MODES:
+            raise ValueError(f"Unknown SMP mode {mode!r}, expected one of {SMP_MODES}")
+        if balance not in BALANCERS:
+            raise ValueError(f"Unknown balancer {balance!r}, expected one of {BALANCERS}")
+        if quantum < 1 or aging_threshold < 1 or balance_interval < 1:
+            raise ValueError("quantum, aging_threshold and balance_interval must be at least 1")
+        if not isinstance(processes, ArrivalCursor):
+            processes = list(processes)
+        self.processes = processes
+        self.arrivals = processes if isinstance(processes, ArrivalCursor) else ArrivalCursor(processes)
+        self.cores = cores
+        self.mode = mode
+        self.balance = balance
+        self.balance_interval = balance_interval
+        self.quantum = quantum
+        self.aging_threshold = aging_threshold
+        self.demotion_threshold = demotion_threshold
+        self.preemptive_sjf = preemptive_sjf
+        self.remaining = {}
+        if mode == "global":
+            self.queues = [ReadyQueues(self.remaining, aging_threshold)] * cores
+        else:
+            self.queues = [ReadyQueues(self.remaining, aging_threshold) for _ in range(cores)]
+        self.initial_priority = {}
+        self.proc_time = {}
+        self.stats = {}
+        # core -> (pid, queue, start, end, slice number) of the slice it is running, else None
+        self.running = [None] * cores
+        self.last_core = {}
+        self.core_stats = [{"busy_time": 0, "dispatches": 0, "completions": 0, "migrations": 0, "balanced_in": 0}
+                           for _ in range(cores)]
+        self.timelines = [Timeline() for _ in range(cores)]
+        self.time = 0
+
+    def run(self, stats_format="dict"):
+        """Simulate until every process has completed and return the final stats"""
+        if stats_format not in STATS_FORMATS:
+            raise ValueError(f"Unknown stats format {stats_format!r}, expected one of {STATS_FORMATS}")
+        n = self.cores
+        global_mode = self.mode == "global"
+        stealing = not global_mode and self.balance == "steal"
+        interval = self.balance_interval if not global_mode and self.balance == "periodic" else None
+        arrivals = self.arrivals
+        queues = self.queues
+        shared = queues[0]
+        remaining = self.remaining
+        initial_priority = self.initial_priority
+        proc_time = self.proc_time
+        stats = self.stats
+        running = self.running
+        last_core = self.last_core
+        core_stats = self.core_stats
+        timelines = self.timelines
+        quantum = self.quantum
+        aging_threshold = self.aging_threshold
+        demotion_threshold = self.demotion_threshold
+        preemptive_sjf = self.preemptive_sjf
+
+        # Processes placed on each core and not completed yet (per-core mode)
+        load = [0] * n
+        idle = set(range(n))
+        # (end, core, slice) of every slice started; stale once the slice is preempted
+        ends = []
+        # (deadline, core) for every push into Q2-Q4 of a per-core queue set; may be stale
+        aging = []
+        live = 0
+        slices = 0
+        time = self.time
+
+        def enqueue(c, pid, qid):
+            queues[c].push(pid, qid, time)
+            stats[pid]["last_wait_start"] = time
+            if qid > 1 and not global_mode:
+                heappush(aging, (time + aging_threshold, c))
+
+        def apply_aging(c):
+            due = queues[c].due_for_aging(time)
+            for pid, old_qid in due:
+                enqueue(c, pid, old_qid - 1)
+            return due
+
+        def start(c, pid, qid):
+            nonlocal slices
+            s = stats[pid]
+            if s["first_response_time"] is None:
+                s["first_response_time"] = time
+            if s["last_wait_start"] is not None:
+                s["total_waiting_time"] += time - s["last_wait_start"]
+                s["last_wait_start"] = None
+            core = core_stats[c]
+            core["dispatches"] += 1
+            if last_core.get(pid, c) != c:
+                core["migrations"] += 1
+            last_core[pid] = c
+            # Q1/Q2 run to completion (unless SJF preemption kicks in), Q3/Q4 get one quantum
+            end = time + remaining[pid] if qid <= 2 else time + min(remaining[pid], quantum)
+            slices += 1
+            running[c] = (pid, qid, time, end, slices)
+            heappush(ends, (end, c, slices))
+            idle.discard(c)
+
+        def stop(c):
+            pid, qid, begun, _, _ = running[c]
+            running[c] = None
+            idle.add(c)
+            used = time - begun
+            remaining[pid] -= used
+            proc_time[pid] += used
+            core_stats[c]["busy_time"] += used
+            timelines[c].add(begun, time, pid, qid)
+            return pid, qid, used
+
+        def dispatch_next(c):
+            q = queues[c]
+            qid = q.highest()
+            start(c, q.pop(qid), qid)
+
+        def move(src, dst):
+            # The busiest core gives up the process it would dispatch next; the aging
+            # deadline is kept by pushing it as of the moment it started waiting
+            q = queues[src]
+            qid = q.highest()
+            pid = q.pop(qid)
+            waiting_since = stats[pid]["last_wait_start"]
+            queues[dst].push(pid, qid, waiting_since)
+            if qid > 1:
+                heappush(aging, (waiting_since + aging_threshold, dst))
+            load[src] -= 1
+            load[dst] += 1
+            core_stats[dst]["balanced_in"] += 1
+
+        while True:
+            # Cores whose queue set gained processes, and cores that became free, at this instant
+            touched = set()
+            freed = set()
+
+            for p in arrivals.arrivals_at(time):
+                pid = p["id"]
+                if pid in stats:
+                    raise _duplicate_id(p, time)
+                remaining[pid] = p["burst"]
+                stats[pid] = _new_stats(p)
+                initial_priority[pid] = p["priority"]
+                proc_time[pid] = 0
+                c = 0 if global_mode else min(range(n), key=load.__getitem__)
+                load[c] += 1
+                live += 1
+                enqueue(c, pid, p["priority"])
+                touched.add(c)
+
+            if global_mode:
+                if apply_aging(0):
+                    touched.add(0)
+            elif aging and aging[0][0] <= time:
+                due_cores = set()
+                while aging and aging[0][0] <= time:
+                    due_cores.add(heappop(aging)[1])
+                for c in sorted(due_cores):
+                    if apply_aging(c):
+                        touched.add(c)
+
+            # Slices ending now: completion, or a quantum expiry with requeue/demotion
+            while ends and ends[0][0] <= time:
+                _, c, number = heappop(ends)
+                if running[c] is None or running[c][4] != number:
+                    continue
+                pid, qid, used = stop(c)
+                freed.add(c)
+                if remaining[pid] == 0:
+                    stats[pid]["completion_time"] = time
+                    proc_time[pid] = 0
+                    core_stats[c]["completions"] += 1
+                    load[c] -= 1
+                    live -= 1
+                elif qid >= 3 and used >= quantum:
+                    if proc_time[pid] >= demotion_threshold and qid < 4:
+                        proc_time[pid] = 0
+                        enqueue(c, pid, qid + 1)
+                    else:
+                        enqueue(c, pid, qid)
+
+            if interval is not None and time % interval == 0:
+                while True:
+                    busiest = max(range(n), key=load.__getitem__)
+                    lightest = min(range(n), key=load.__getitem__)
+                    if load[busiest] - load[lightest] <= 1:
+                        break
+                    move(busiest, lightest)
+                    touched.add(lightest)
+
+            # Free cores take the highest priority process available to them
+            if global_mode:
+                while idle and shared:
+                    qid = shared.highest()
+                    pid = shared.pop(qid)
+                    c = last_core.get(pid)
+                    if c not in idle:
+                        c = min(idle)
+                    start(c, pid, qid)
+            else:
+                for c in sorted(idle & (touched | freed)):
+                    if queues[c]:
+                        dispatch_next(c)
+                if stealing and idle and live > n - len(idle):
+                    for c in sorted(idle):
+                        # Any queued process sits on a core with a load of at least 2
+                        victim = max(range(n), key=load.__getitem__)
+                        if load[victim] < 2:
+                            break
+                        move(victim, c)
+                        dispatch_next(c)
+
+            # Only a newly queued Q2 job can undercut a running one
+            if preemptive_sjf and touched:
+                if global_mode:
+                    while shared.size[2]:
+                        victim = None
+                        for c in range(n):
+                            r = running[c]
+                            if r is not None and r[1] == 2 and (victim is None or r[3] > running[victim][3]):
+                                victim = c
+                        # A running Q2 job has end - time burst left
+                        if victim is None or shared.shortest_remaining() >= running[victim][3] - time:
+                            break
+                        pid, qid, _ = stop(victim)
+                        enqueue(victim, pid, qid)
+                        dispatch_next(victim)
+                else:
+                    for c in touched:
+                        r = running[c]
+                        if r is not None and r[1] == 2:
+                            shortest = queues[c].shortest_remaining()
+                            if shortest is not None and shortest < r[3] - time:
+                                pid, qid, _ = stop(c)
+                                enqueue(c, pid, qid)
+                                dispatch_next(c)
+
+            if not live and arrivals.exhausted():
+                break
+            # Jump to the next instant where anything can happen
+            candidates = []
+            next_arrival = arrivals.next_arrival_time()
+            if next_arrival is not None:
+                candidates.append(next_arrival)
+            while ends and (running[ends[0][1]] is None or running[ends[0][1]][4] != ends[0][2]):
+                heappop(ends)
+            if ends:
+                candidates.append(ends[0][0])
+            if global_mode:
+                next_aging = shared.next_deadline()
+                if next_aging is not None:
+                    candidates.append(next_aging)
+            else:
+                while aging:
+                    deadline, c = aging[0]
+                    live_deadline = queues[c].next_deadline()
+                    if live_deadline == deadline:
+                        candidates.append(deadline)
+                        break
+                    heappop(aging)
+                    if live_deadline is not None:
+                        heappush(aging, (live_deadline, c))
+                if interval is not None and live > n - len(idle):
+                    candidates.append((time // interval + 1) * interval)
+            time = min(candidates)
+
+        self.time = time
+        return _final_stats(stats, self.processes, initial_priority, stats_format)
+
+    def core_summary(self):
+        """Per-core statistics, one dict per core"""
+        summary = []
+        for c, core in enumerate(self.core_stats):
+            summary.append(dict(core, core=c, utilization=core["busy_time"] / self.time if self.time else 0.0,
+                                timeline=self.timelines[c]))
+        return summary
+
+
+def simulate_smp(processes, cores=4, mode="global", balance="steal", balance_interval=10, quantum=3,
+                 aging_threshold=5, demotion_threshold=6, preemptive_sjf=True, stats_format="dict"):
+    """Run a whole multi-core simulation and return ``(stats, cores)``.
+
+    ``stats`` are the usual per-process statistics; ``cores`` is
+    ``SMPScheduler.core_summary()``.  ``balance`` and ``balance_interval``
+    only apply to ``mode="per-core"``.
+    """
+    scheduler = SMPScheduler(processes, cores, mode, balance, balance_interval, quantum, aging_threshold,
+                             demotion_threshold, preemptive_sjf)
+    stats = scheduler.run(stats_format)
+    return stats, scheduler.core_summary()
@@ -0,0 +1,138 @@
+"""Columnar per-process statistics backed by NumPy arrays.
+
+``ProcessStats`` holds the final statistics of a run as one array per
+field, so averages, percentiles and per-priority breakdowns are computed in
+vectorized form.  It is also a read-only mapping ``pid -> dict`` that yields
+exactly the per-process dicts ``run_scheduler`` has always returned.
+"""
+from collections.abc import Mapping
+
+import numpy as np
+
+from mlq_events import METRICS, PERCENTILES, summary_dict
+
+# Recorded fields; -1 marks a time that never happened (e.g. not completed)
+FIELDS = ("arrival_time", "burst_time", "priority", "first_response_time", "completion_time", "total_waiting_time")
+
+
+class ProcessStats(Mapping):
+    """Final statistics of a run, one NumPy column per field.
+
+    ``columns`` maps ``"pid"`` (object array, or a fixed-width str array for
+    compact runs over a streamed trace), every name in FIELDS and every name
+    in METRICS to an array with one entry per process, in input order.
+    ``priority`` is the queue a process arrived in.  Metrics are 0 for
+    processes that did not complete.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self._rows = None
+
+    @classmethod
+    def from_columns(cls, pid, arrival_time, burst_time, priority, first_response_time, completion_time,
+                     total_waiting_time):
+        columns = {
+            "pid": pid if isinstance(pid, np.ndarray) and pid.dtype.kind == "U" else np.asarray(pid, dtype=object),
+            "arrival_time": np.asarray(arrival_time, dtype=np.int64),
+            "burst_time": np.asarray(burst_time, dtype=np.int64),
+            "priority": np.asarray(priority, dtype=np.int64),
+            "first_response_time": np.asarray(first_response_time, dtype=np.int64),
+            "completion_time": np.asarray(completion_time, dtype=np.int64),
+            "total_waiting_time": np.asarray(total_waiting_time, dtype=np.int64),
+        }
+        completed = columns["completion_time"] >= 0
+        arrival = columns["arrival_time"]
+        first_response = columns["first_response_time"]
+        columns["turnaround_time"] = np.where(completed, columns["completion_time"] - arrival, 0)
+        columns["waiting_time"] = np.where(completed, columns["total_waiting_time"], 0)
+        # Same rule as the dict form: a first response at time 0 counts as 0
+        columns["response_time"] = np.where(completed & (first_response > 0), first_response - arrival, 0)
+        return cls(columns)
+
+    @classmethod
+    def from_dict(cls, stats, priorities=None):
+        """Build from the dict form, with initial priorities taken from `priorities` (pid -> queue)"""
+        count = len(stats)
+        records = stats.values()
+
+        def column(key):
+            return np.fromiter((-1 if s[key] is None else s[key] for s in records), dtype=np.int64, count=count)
+
+        if priorities is None:
+            priority = np.zeros(count, dtype=np.int64)
+        else:
+            priority = np.fromiter((priorities[pid] for pid in stats), dtype=np.int64, count=count)
+        pids = np.empty(count, dtype=object)
+        pids[:] = list(stats)
+        return cls.from_columns(pids, column("arrival_time"), column("burst_time"), priority,
+                                column("first_response_time"), column("completion_time"),
+                                column("total_waiting_time"))
+
+    # ---- mapping view (backwards compatible dict form) ----
+
+    def __getitem__(self, pid):
+        if self._rows is None:
+            self._rows = {p: row for row, p in enumerate(self.columns["pid"].tolist())}
+        return self.record(self._rows[pid])
+
+    def __iter__(self):
+        # tolist() hands out plain str for either kind of pid column
+        return iter(self.columns["pid"].tolist())
+
+    def __len__(self):
+        return len(self.columns["pid"])
+
+    def record(self, row):
+        """The dict run_scheduler reports for the process in `row`"""
+        c = self.columns
+        completion = int(c["completion_time"][row])
+        first_response = int(c["first_response_time"][row])
+        record = {
+            "arrival_time": int(c["arrival_time"][row]),
+            "burst_time": int(c["burst_time"][row]),
+            "first_response_time": first_response if first_response >= 0 else None,
+            "completion_time": completion if completion >= 0 else None,
+            "total_waiting_time": int(c["total_waiting_time"][row]),
+            "last_wait_start": None,
+        }
+        if completion >= 0:
+            for metric in METRICS:
+                record[metric] = int(c[metric][row])
+        return record
+
+    def as_dict(self):
+        """Materialize the whole dict form"""
+        return {pid: self.record(row) for row, pid in enumerate(self.columns["pid"].tolist())}
+
+    # ---- vectorized aggregates ----
+
+    @property
+    def completed(self):
+        """Boolean mask of processes that completed"""
+        return self.columns["completion_time"] >= 0
+
+    def summary(self, mask=None):
+        """Mean, p50/p95/p99 and max of TAT, WT and RT over completed processes.
+
+        Returns ``{"count": n, "turnaround_time": {"mean": ..., "p50": ...,
+        "p95": ..., "p99": ..., "max": ...}, "waiting_time": ..., "response_time": ...}``.
+        An optional boolean `mask` narrows the processes further.
+        """
+        selected = self.completed if mask is None else self.completed & mask
+
+        def describe(metric):
+            values = self.columns[metric][selected]
+            return values.mean(), np.percentile(values, PERCENTILES), values.max()
+
+        return summary_dict(int(np.count_nonzero(selected)), describe)
+
+    def by_priority(self):
+        """``summary()`` for each initial priority class, keyed by queue number"""
+        priority = self.columns["priority"]
+        return {int(qid): self.summary(priority == qid) for qid in np.unique(priority[self.completed])}
+
+    def averages(self):
+        """Average (TAT, WT, RT) over completed processes"""
+        summary = self.summary()
+        return tuple(summary[metric]["mean"] for metric in METRICS)
@@ -0,0 +1,154 @@
+"""Parameter sweeps: run one workload under many scheduler configurations.
+
+Usage:
+    python mlq_sweep.py workload.json --quantum 2 3 4 --aging-threshold 5 10 --workers 8
+
+The workload file is a JSON list of ``{"id", "arrival", "burst", "priority"}``
+objects, or a CSV/JSONL trace (see ``mlq_workload``).  Runs are spread over a ``ProcessPoolExecutor``
+with ``run_parallel``; each worker gets the workload once, through the pool
+initializer, and every task only carries its parameter set.  Results come
+back in grid order, so the table is the same whatever the number of workers.
+``run_parallel`` and ``print_table`` are shared with ``mlq_montecarlo``.
+"""
+import argparse
+import csv
+import functools
+import itertools
+import json
+import math
+import os
+import sys
+
+from mlq_events import TRACE_NONE
+from mlq_logic import ENGINES, iter_events
+from mlq_workload import read_trace
+
+PARAMETERS = ("quantum", "aging_threshold", "demotion_threshold", "preemptive_sjf")
+# Averages reported per configuration, in the order run_config returns them
+METRICS = ("avg_tat", "avg_wt", "avg_rt")
+
+# Task and shared arguments of the current worker process, set by _init_worker
+_task = None
+_shared = ()
+
+
+def expand_grid(grid):
+    """Expand {"quantum": [2, 3], ...} into a list of parameter dicts.
+
+    Parameters vary in PARAMETERS order, the last one fastest; parameters
+    missing from the grid keep run_scheduler's defaults.
+    """
+    unknown = set(grid) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(sorted(unknown))}")
+    names = [name for name in PARAMETERS if name in grid]
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def run_config(processes, params, engine="event"):
+    """Run one configuration without tracing and return its average (TAT, WT, RT)"""
+    *_, (_, stats) = iter_events(processes, engine=engine, trace=TRACE_NONE, stats_format="columns", **params)
+    return stats.averages()
+
+
+def _init_worker(task, shared):
+    global _task, _shared
+    _task = task
+    _shared = shared
+
+
+def _run_in_worker(item):
+    return _task(*_shared, item)
+
+
+def run_parallel(task, items, shared=(), workers=None):
+    """Return ``[task(*shared, item) for item in items]``, computed on `workers` processes.
+
+    `task` must be picklable (a module-level function or a ``functools.partial``
+    of one).  ``shared`` reaches each worker once, through the pool
+    initializer, so tasks only carry their item.  ``workers`` defaults to the
+    number of CPUs; with one worker everything runs in this process.
+    """
+    items = list(items)
+    workers = min(workers or os.cpu_count() or 1, len(items)) or 1
+    if workers == 1:
+        return [task(*shared, item) for item in items]
+
+    # Imported here so the CLI helpers (e.g. parse_bool for mlq.py) stay cheap to import
+    from concurrent.futures import ProcessPoolExecutor
+
+    # A few chunks per worker keeps every core busy without a round trip per task
+    chunksize = max(1, math.ceil(len(items) / (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(task, shared)) as pool:
+        return list(pool.map(_run_in_worker, items, chunksize=chunksize))
+
+
+def sweep(processes, grid, workers=None, engine="event"):
+    """Run every configuration of `grid` against `processes`.
+
+    Returns one row per configuration, in grid order: the parameter values
+    plus ``avg_tat``, ``avg_wt`` and ``avg_rt``.  ``workers`` defaults to the
+    number of CPUs; ``workers=1`` runs everything in this process.
+    """
+    configs = expand_grid(grid)
+    results = run_parallel(functools.partial(run_config, engine=engine), configs, (list(processes),), workers)
+
+    rows = []
+    for params, averages in zip(configs, results):
+        row = dict(params)
+        row.update(zip(METRICS, averages))
+        rows.append(row)
+    return rows
+
+
+def parse_bool(text):
+    """argparse type for true/false options (also used by mlq.py and mlq_montecarlo)"""
+    if text.lower() in ("1", "true", "yes", "on"):
+        return True
+    if text.lower() in ("0", "false", "no", "off"):
+        return False
+    raise argparse.ArgumentTypeError(f"expected true/false, got {text!r}")
+
+
+def print_table(rows, names, headers=METRICS, cells=None, width=18):
+    """Print one line per row: the parameters in `names`, then one column per header.
+
+    ``cells(row)`` returns the metric cells of a row, each `width`
+    characters wide; by default the METRICS values with two decimals.
+    """
+    print(" ".join([f"{name:>18}" for name in names] + [f"{header:>{width}}" for header in headers]))
+    for row in rows:
+        metric_cells = cells(row) if cells else [f"{row[metric]:>{width}.2f}" for metric in METRICS]
+        print(" ".join([f"{str(row[name]):>18}" for name in names] + metric_cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep MLFQ scheduler parameters over one workload.")
+    parser.add_argument("workload", help="JSON list, CSV or JSONL file of {id, arrival, burst, priority} records")
+    parser.add_argument("--quantum", type=int, nargs="+")
+    parser.add_argument("--aging-threshold", type=int, nargs="+")
+    parser.add_argument("--demotion-threshold", type=int, nargs="+")
+    parser.add_argument("--preemptive-sjf", type=parse_bool, nargs="+")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all CPUs)")
+    parser.add_argument("--engine", choices=ENGINES, default="event")
+    parser.add_argument("--format", choices=["table", "csv", "json"], default="table")
+    args = parser.parse_args(argv)
+
+    processes = list(read_trace(args.workload, require_sorted=False))
+    grid = {name: getattr(args, name) for name in PARAMETERS if getattr(args, name) is not None}
+
+    rows = sweep(processes, grid, workers=args.workers, engine=args.engine)
+    if args.format == "json":
+        json.dump(rows, sys.stdout, indent=2)
+        print()
+    elif args.format == "csv":
+        names = [name for name in PARAMETERS if name in grid]
+        writer = csv.DictWriter(sys.stdout, fieldnames=names + list(METRICS))
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        print_table(rows, [name for name in PARAMETERS if name in grid])
+
+
+if __name__ == "__main__":
+    main()
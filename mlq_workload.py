@@ -0,0 +1,244 @@
+"""Streaming workload loader for large job traces.
+
+Traces are CSV files with an ``id,arrival,burst,priority`` header (extra
+columns are ignored) or JSONL files with one ``{"id", "arrival", "burst",
+"priority"}`` object per line.  ``read_trace`` checks every row as it reads
+and yields one process dict at a time, so ``open_trace`` can feed a
+multi-million row trace to the scheduler without building a list:
+
+    *_, (_, stats) = iter_events(open_trace("jobs.csv"), trace=TRACE_NONE)
+
+Streamed traces must already be ordered by arrival time.  ``build_cache``
+converts a trace (sorted or not) into a NumPy ``.npy`` file ordered by
+arrival; ``open_trace(path, cache=True)`` builds it once and afterwards
+memory-maps it, which skips parsing on repeat runs.
+"""
+import csv
+import json
+import os
+
+from mlq_logic import ArrivalCursor
+
+FIELDS = ("id", "arrival", "burst", "priority")
+QUEUES = (1, 2, 3, 4)
+# Rows converted per step when building or reading a binary cache
+CHUNK_SIZE = 65536
+
+
+def _int_field(value, name, where):
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    elif isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise ValueError(f"{where}: {name} must be an integer, got {value!r}")
+
+
+def check_process(record, where="process"):
+    """Validate one raw record and return it as a process dict.
+
+    ``where`` (e.g. ``"jobs.csv:12"``) prefixes error messages.
+    """
+    pid = record.get("id")
+    if pid is None or str(pid).strip() == "":
+        raise ValueError(f"{where}: missing id")
+    for name in FIELDS[1:]:
+        if record.get(name) is None:
+            raise ValueError(f"{where}: missing {name}")
+    process = {
+        "id": str(pid).strip(),
+        "arrival": _int_field(record["arrival"], "arrival", where),
+        "burst": _int_field(record["burst"], "burst", where),
+        "priority": _int_field(record["priority"], "priority", where),
+    }
+    if process["arrival"] < 0:
+        raise ValueError(f"{where}: arrival must be >= 0, got {process['arrival']}")
+    if process["burst"] < 1:
+        raise ValueError(f"{where}: burst must be >= 1, got {process['burst']}")
+    if process["priority"] not in QUEUES:
+        raise ValueError(f"{where}: priority must be one of {QUEUES}, got {process['priority']}")
+    return process
+
+
+def _read_csv(path):
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        header = [name.strip().lower() for name in header]
+        missing = [name for name in FIELDS if name not in header]
+        if missing:
+            raise ValueError(f"{path}:1: missing column(s) {', '.join(missing)}")
+        columns = [header.index(name) for name in FIELDS]
+        for row in reader:
+            if not row:
+                continue
+            where = f"{path}:{reader.line_num}"
+            if len(row) < len(header):
+                raise ValueError(f"{where}: expected {len(header)} fields, got {len(row)}")
+            yield check_process(dict(zip(FIELDS, (row[c] for c in columns))), where)
+
+
+def _read_jsonl(path):
+    with open(path) as f:
+        for line_num, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            where = f"{path}:{line_num}"
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{where}: invalid JSON ({e.msg})") from None
+            if not isinstance(record, dict):
+                raise ValueError(f"{where}: expected an object, got {type(record).__name__}")
+            yield check_process(record, where)
+
+
+def _read_json(path):
+    # A plain JSON list (the sweep workload format) is loaded whole
+    with open(path) as f:
+        records = json.load(f)
+    if not isinstance(records, list):
+        raise ValueError(f"{path}: expected a list of processes")
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise ValueError(f"{path}[{index}]: expected an object, got {type(record).__name__}")
+        yield check_process(record, f"{path}[{index}]")
+
+
+def _reader(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return _read_csv(path)
+    if extension in (".jsonl", ".ndjson"):
+        return _read_jsonl(path)
+    if extension == ".json":
+        return _read_json(path)
+    raise ValueError(f"Unknown trace format {extension!r}, expected .csv, .jsonl or .json")
+
+
+def read_trace(path, require_sorted=True):
+    """Yield validated process dicts from a CSV, JSONL or JSON trace.
+
+    With ``require_sorted`` a row arriving before its predecessor raises
+    ValueError (streamed runs need arrival order; ``build_cache`` sorts).
+    Without it the whole trace is being collected anyway, and a repeated id
+    raises ValueError too; streamed runs leave that check to the engine,
+    which rejects an arriving id that is already in the run.
+    """
+    last = None
+    seen = None if require_sorted else set()
+    for process in _reader(path):
+        if require_sorted and last is not None and process["arrival"] < last["arrival"]:
+            raise ValueError(f"{path}: trace is not sorted by arrival: {process['id']} arrives at "
+                             f"{process['arrival']} after {last['id']} at {last['arrival']}"
+                             " (build_cache sorts it)")
+        if seen is not None:
+            if process["id"] in seen:
+                raise ValueError(f"{path}: duplicate process id {process['id']!r}")
+            seen.add(process["id"])
+        last = process
+        yield process
+
+
+def default_cache_path(path):
+    return path + ".npy"
+
+
+def build_cache(path, cache_path=None):
+    """Convert a trace into an arrival-ordered ``.npy`` cache and return its path.
+
+    Rows are packed into NumPy arrays CHUNK_SIZE at a time and written
+    through a memory-mapped file; an unsorted trace is stably sorted by
+    arrival, so processes arriving together keep their trace order.  A
+    repeated id raises ValueError.
+    """
+    import numpy as np
+
+    cache_path = cache_path or default_cache_path(path)
+    # Each chunk becomes compact arrays as soon as it is full, so parsing never holds more
+    # than CHUNK_SIZE rows as Python objects
+    chunks = {name: [] for name in FIELDS}
+    rows = []
+
+    def flush():
+        if rows:
+            for name, values in zip(FIELDS, zip(*rows)):
+                chunks[name].append(np.asarray(values, dtype=None if name == "id" else np.int64))
+            rows.clear()
+
+    # Ids are checked for repeats once they are packed into a column, not with a set of strings
+    for process in _reader(path):
+        rows.append((process["id"], process["arrival"], process["burst"], process["priority"]))
+        if len(rows) == CHUNK_SIZE:
+            flush()
+    flush()
+
+    if not chunks["id"]:
+        columns = {"id": np.empty(0, dtype="U1"), **{name: np.empty(0, dtype=np.int64) for name in FIELDS[1:]}}
+    else:
+        columns = {name: np.concatenate(chunks[name]) for name in FIELDS}
+    del chunks
+    unique, counts = np.unique(columns["id"], return_counts=True)
+    if len(unique) < len(columns["id"]):
+        raise ValueError(f"{path}: duplicate process id {str(unique[np.argmax(counts > 1)])!r}")
+    del unique, counts
+    arrival = columns["arrival"]
+    if len(arrival) > 1 and (arrival[1:] < arrival[:-1]).any():
+        order = np.argsort(arrival, kind="stable")
+        columns = {name: column[order] for name, column in columns.items()}
+
+    dtype = np.dtype([("id", columns["id"].dtype), ("arrival", np.int64), ("burst", np.int64), ("priority", np.int8)])
+    # Write to a temporary name first so a crash never leaves a truncated cache behind
+    partial_path = cache_path + ".partial"
+    table = np.lib.format.open_memmap(partial_path, mode="w+", dtype=dtype, shape=(len(arrival),))
+    for name in FIELDS:
+        table[name] = columns[name]
+    table.flush()
+    del table
+    os.replace(partial_path, cache_path)
+    return cache_path
+
+
+def load_cache(cache_path):
+    """Memory-map a cache written by build_cache (read-only structured array)"""
+    import numpy as np
+
+    table = np.load(cache_path, mmap_mode="r")
+    if table.dtype.names != FIELDS:
+        raise ValueError(f"{cache_path}: not a workload cache (fields {table.dtype.names})")
+    return table
+
+
+def iter_cache(table):
+    """Yield process dicts from a cache table, converting CHUNK_SIZE rows at a time"""
+    for start in range(0, len(table), CHUNK_SIZE):
+        chunk = table[start:start + CHUNK_SIZE]
+        for pid, arrival, burst, priority in zip(chunk["id"].tolist(), chunk["arrival"].tolist(),
+                                                 chunk["burst"].tolist(), chunk["priority"].tolist()):
+            yield {"id": pid, "arrival": arrival, "burst": burst, "priority": priority}
+
+
+def _cache_is_fresh(path, cache_path):
+    return os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path)
+
+
+def open_trace(path, cache=False, cache_path=None):
+    """An ArrivalCursor over a trace file, for iter_events / run_scheduler.
+
+    Without ``cache`` the trace is parsed lazily as the run advances.  With
+    ``cache=True`` the binary cache next to the trace (or at ``cache_path``)
+    is rebuilt when missing or older than the trace, then memory-mapped.
+    A ``.npy`` path is opened as a cache directly.
+    """
+    if path.endswith(".npy"):
+        return ArrivalCursor(iter_cache(load_cache(path)), presorted=True)
+    if cache:
+        cache_path = cache_path or default_cache_path(path)
+        if not _cache_is_fresh(path, cache_path):
+            build_cache(path, cache_path)
+        return ArrivalCursor(iter_cache(load_cache(cache_path)), presorted=True)
+    return ArrivalCursor(read_trace(path), presorted=True)
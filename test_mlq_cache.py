@@ -0,0 +1,77 @@
+"""Tests for the two-tier result cache and its automatic invalidation."""
+import random
+
+import mlq_cache
+from mlq_cache import ResultCache, result_key
+from mlq_logic import simulate
+from test_mlq_logic import random_workload
+
+
+def workload(seed=0):
+    return random_workload(random.Random(seed))
+
+
+def test_memory_tier_evicts_the_least_recently_used_entry():
+    cache = ResultCache(max_entries=2)
+    results = {}
+    for name in "abc":
+        processes, params = workload(ord(name))
+        results[name] = result_key(processes, **params), simulate(processes, **params)
+    for name in "ab":
+        cache.put(results[name][0], *results[name][1])
+    assert cache.get(results["a"][0]) is not None
+    cache.put(results["c"][0], *results["c"][1])
+
+    assert len(cache) == 2
+    assert cache.get(results["b"][0]) is None
+    for name in "ac":
+        stats, timeline = cache.get(results[name][0])
+        assert stats == results[name][1][0]
+        assert timeline.segments == results[name][1][1].segments
+
+
+def test_disk_tier_is_found_by_a_fresh_cache(tmp_path):
+    processes, params = workload()
+    stats, timeline = ResultCache(directory=tmp_path).simulate(processes, **params)
+
+    cache = ResultCache(directory=tmp_path)
+    cached_stats, cached_timeline = cache.simulate(processes, **params)
+    assert (cache.disk_hits, cache.misses) == (1, 0)
+    assert cached_stats == stats
+    assert cached_timeline.segments == timeline.segments
+    # Found on disk once, then served from memory
+    cache.simulate(processes, **params)
+    assert (cache.hits, cache.disk_hits) == (1, 1)
+
+
+def test_returned_results_are_copies():
+    processes, params = workload()
+    cache = ResultCache()
+    stats, timeline = cache.simulate(processes, **params)
+    expected_stats, expected_timeline = simulate(processes, **params)
+    for s in stats.values():
+        s["completion_time"] = -1
+    stats.clear()
+    timeline.segments.clear()
+
+    stats, timeline = cache.simulate(processes, **params)
+    assert cache.hits == 1
+    assert stats == expected_stats
+    assert timeline.segments == expected_timeline.segments
+
+
+def test_an_engine_change_misses(tmp_path, monkeypatch):
+    processes, params = workload()
+    cache = ResultCache(directory=tmp_path)
+    cache.simulate(processes, **params)
+    key = result_key(processes, **params)
+
+    monkeypatch.setattr(mlq_cache, "ENGINE_VERSION", mlq_cache.ENGINE_VERSION + 1)
+    monkeypatch.setattr(mlq_cache, "_fingerprint", None)
+    assert result_key(processes, **params) != key
+    fresh = ResultCache(directory=tmp_path)
+    fresh.simulate(processes, **params)
+    assert (fresh.misses, fresh.disk_hits) == (1, 0)
+    # The entries of the old fingerprint are left for prune
+    assert fresh.prune() == 1
+    assert len(list(tmp_path.iterdir())) == 1
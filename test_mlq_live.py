@@ -0,0 +1,76 @@
+"""Checks that LiveRunner reproduces a batch run of the same jobs."""
+import asyncio
+import random
+
+import pytest
+
+from mlq_events import TRACE_TICKS, TRACE_TRANSITIONS
+from mlq_live import LiveRunner
+from mlq_logic import iter_events
+from mlq_sinks import CallbackSink
+from test_mlq_logic import SEEDS, random_workload
+
+
+async def feed(processes, rng, heartbeats):
+    """Yield the jobs in arrival order, handing control back to the loop at random points"""
+    time = 0
+    for p in processes:
+        if heartbeats:
+            while rng.random() < 0.3:
+                time = rng.randint(time, p["arrival"])
+                yield time
+        time = p["arrival"]
+        yield dict(p)
+        if rng.random() < 0.5:
+            await asyncio.sleep(0)
+    if heartbeats:
+        yield time + rng.randint(0, 50)
+
+
+def run_live(processes, params, rng, heartbeats=False, max_pending=4096, trace=TRACE_TRANSITIONS, sink=None):
+    async def main():
+        runner = LiveRunner(feed(processes, rng, heartbeats), trace=trace, max_pending=max_pending, sink=sink,
+                            **params)
+        batches = runner.subscribe("events")
+
+        async def collect():
+            return [event async for batch in batches for event in batch]
+
+        return await asyncio.gather(runner.run(), collect())
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("heartbeats, max_pending, trace", [
+    (False, 4096, TRACE_TRANSITIONS),
+    (True, 4096, TRACE_TRANSITIONS),
+    (False, 1, TRACE_TICKS),
+    (True, 1, TRACE_TRANSITIONS),
+])
+@pytest.mark.parametrize("seed", SEEDS[:50])
+def test_live_run_matches_a_batch_run(seed, heartbeats, max_pending, trace):
+    rng = random.Random(seed)
+    processes, params = random_workload(rng)
+    processes.sort(key=lambda p: p["arrival"])
+    *reference, (_, reference_stats) = iter_events(processes, engine="event", trace=trace, **params)
+
+    stats, events = run_live(processes, params, rng, heartbeats, max_pending, trace)
+    assert events == reference
+    assert stats == reference_stats
+
+
+@pytest.mark.parametrize("seed", SEEDS[:50])
+def test_live_run_with_a_sink(seed):
+    rng = random.Random(seed)
+    processes, params = random_workload(rng)
+    processes.sort(key=lambda p: p["arrival"])
+    *reference, (_, reference_stats) = iter_events(processes, engine="event", **params)
+
+    records = []
+    stats, events = run_live(processes, params, rng, heartbeats=True, max_pending=1,
+                             sink=CallbackSink(records.append))
+    assert events == reference
+    assert stats == {}
+    metrics = ("completion_time", "turnaround_time", "waiting_time", "response_time")
+    assert {record["pid"]: [record[name] for name in metrics] for record in records} == \
+        {pid: [s[name] for name in metrics] for pid, s in reference_stats.items()}
@@ -0,0 +1,107 @@
+"""Equivalence checks for the scheduler engines (and mlq_smp) on seeded random workloads.
+
+Run with ``python -m pytest`` from the repository root.
+"""
+import json
+import random
+
+import pytest
+
+from mlq_events import TRACE_NONE, TRACE_TICKS
+from mlq_logic import ENGINES, STATS_FORMATS, ArrivalCursor, EventScheduler, iter_events, run_scheduler, simulate
+from mlq_smp import simulate_smp
+
+SEEDS = range(200)
+
+
+def random_workload(rng):
+    """A small workload plus scheduler parameters, varied enough to hit idle gaps,
+    simultaneous arrivals, aging, demotion and SJF preemption"""
+    n = rng.randint(1, 30)
+    horizon = n * rng.choice([1, 3, 20])
+    processes = [{"id": f"P{i + 1}", "arrival": rng.randint(0, horizon),
+                  "burst": rng.randint(1, rng.choice([3, 25, 120])), "priority": rng.randint(1, 4)}
+                 for i in range(n)]
+    params = {"quantum": rng.randint(1, 8), "aging_threshold": rng.randint(1, 30),
+              "demotion_threshold": rng.randint(1, 12), "preemptive_sjf": rng.random() < 0.6}
+    return processes, params
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_engines_print_the_same_log(seed):
+    processes, params = random_workload(random.Random(seed))
+    reference = list(run_scheduler(processes, engine="tick", **params))
+    for engine in ENGINES[1:]:
+        assert list(run_scheduler(processes, engine=engine, **params)) == reference, engine
+
+
+def test_engines_on_an_empty_workload():
+    for engine in ENGINES:
+        assert list(run_scheduler([], engine=engine)) == [("STATS", {})]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("stats_format", STATS_FORMATS)
+@pytest.mark.parametrize("streamed", [False, True])
+def test_engines_reject_duplicate_ids(engine, stats_format, streamed):
+    processes = [{"id": "A", "arrival": 0, "burst": 3, "priority": 1},
+                 {"id": "A", "arrival": 1, "burst": 3, "priority": 1}]
+    if streamed:
+        processes = ArrivalCursor(processes, presorted=True)
+    with pytest.raises(ValueError, match="Duplicate process id 'A'"):
+        list(iter_events(processes, engine=engine, trace=TRACE_NONE, stats_format=stats_format))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_snapshot_and_resume_continue_the_run(seed):
+    rng = random.Random(seed)
+    processes, params = random_workload(rng)
+    *reference, (_, reference_stats) = EventScheduler(processes, **params).run(TRACE_TICKS)
+
+    scheduler = EventScheduler(processes, **params)
+    # Anywhere before the last completion, including inside idle gaps and runs
+    cut = rng.randint(0, max(event.time for event in reference) - 1)
+    events = list(scheduler.run(TRACE_TICKS, until=cut))
+    snapshot = json.loads(json.dumps(scheduler.snapshot()))
+    *rest, (_, stats) = EventScheduler.resume(snapshot, processes).run(TRACE_TICKS)
+    assert events + rest == reference
+    assert stats == reference_stats
+
+
+SMP_SETUPS = [("global", "steal"), ("per-core", "steal"), ("per-core", "periodic")]
+
+
+@pytest.mark.parametrize("mode, balance", SMP_SETUPS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_smp_on_one_core_is_the_single_cpu_schedule(seed, mode, balance):
+    rng = random.Random(seed)
+    processes, params = random_workload(rng)
+    stats, timeline = simulate(processes, **params)
+    smp_stats, (core,) = simulate_smp(processes, cores=1, mode=mode, balance=balance,
+                                      balance_interval=rng.randint(1, 15), **params)
+    assert smp_stats == stats
+    assert core["timeline"].segments == timeline.segments
+
+
+@pytest.mark.parametrize("mode, balance", SMP_SETUPS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_smp_runs_every_process_once_at_a_time(seed, mode, balance):
+    rng = random.Random(seed)
+    processes, params = random_workload(rng)
+    stats, cores = simulate_smp(processes, cores=rng.choice([2, 3, 8]), mode=mode, balance=balance,
+                                balance_interval=rng.randint(1, 15), **params)
+    assert all(s["completion_time"] is not None for s in stats.values())
+    assert len(stats) == len(processes)
+    assert sum(core["busy_time"] for core in cores) == sum(p["burst"] for p in processes)
+
+    runs = {}
+    for core in cores:
+        for segment in core["timeline"]:
+            runs.setdefault(segment.pid, []).append(segment)
+    for p in processes:
+        segments = sorted(runs[p["id"]])
+        assert sum(end - start for start, end, _, _ in segments) == p["burst"]
+        # Never on two cores at once, never before arriving, done at completion
+        assert segments[0].start >= p["arrival"]
+        assert all(earlier.end <= later.start for earlier, later in zip(segments, segments[1:]))
+        assert segments[-1].end == stats[p["id"]]["completion_time"]
@@ -0,0 +1,54 @@
+"""Tests for streaming sinks: retired records and the quantile sketch."""
+import random
+
+import numpy as np
+import pytest
+
+from mlq_events import TRACE_TICKS
+from mlq_logic import iter_events
+from mlq_sinks import RECORD_FIELDS, CallbackSink, QuantileSketch
+from test_mlq_logic import SEEDS, random_workload
+
+
+@pytest.mark.parametrize("engine", ["tick", "event"])
+@pytest.mark.parametrize("seed", SEEDS[:50])
+def test_sink_records_match_the_stats_of_a_run_without_sink(engine, seed):
+    processes, params = random_workload(random.Random(seed))
+    *reference_events, (_, reference) = iter_events(processes, engine=engine, trace=TRACE_TICKS, **params)
+
+    records = []
+    *events, (_, stats) = iter_events(processes, engine=engine, trace=TRACE_TICKS,
+                                      sink=CallbackSink(records.append), **params)
+    assert events == reference_events
+    assert stats == {}
+    assert sorted(record["pid"] for record in records) == sorted(reference)
+    priorities = {p["id"]: p["priority"] for p in processes}
+    for record in records:
+        expected = reference[record["pid"]]
+        assert list(record) == list(RECORD_FIELDS)
+        assert record["priority"] == priorities[record["pid"]]
+        for name in RECORD_FIELDS[1:]:
+            if name != "priority":
+                assert record[name] == expected[name], name
+
+
+@pytest.mark.parametrize("relative_accuracy", [0.01, 0.05])
+@pytest.mark.parametrize("seed", range(5))
+def test_quantile_sketch_stays_within_its_relative_accuracy(relative_accuracy, seed):
+    rng = np.random.default_rng(seed)
+    # Heavy-tailed, with exact zeros and a mix of integers and floats
+    values = np.concatenate([np.ceil(rng.pareto(1.2, 5000)), rng.lognormal(2, 1.5, 5000), np.zeros(300)])
+    rng.shuffle(values)
+    sketch = QuantileSketch(relative_accuracy)
+    half = QuantileSketch(relative_accuracy)
+    for i, value in enumerate(values.tolist()):
+        (sketch if i % 2 else half).add(value)
+    sketch.merge(half)
+
+    assert sketch.count == len(values)
+    for q in (0.0, 0.01, 0.1, 0.25, 0.5, 0.9, 0.95, 0.99, 0.999, 1.0):
+        # The sketch answers with a value of rank floor(q * (n - 1)), as percentile's "lower" method picks
+        exact = np.percentile(values, q * 100, method="lower")
+        assert abs(sketch.quantile(q) - exact) <= relative_accuracy * exact + 1e-9, q
+    assert sketch.quantile(0.0) == values.min()
+    assert sketch.quantile(1.0) == values.max()
@@ -0,0 +1,91 @@
+"""Tests for trace validation, the binary cache and its rebuilds."""
+import json
+import os
+
+import pytest
+
+from mlq_workload import build_cache, load_cache, open_trace, read_trace
+
+
+def write_csv(tmp_path, rows, header="id,arrival,burst,priority", name="jobs.csv"):
+    path = tmp_path / name
+    path.write_text("\n".join([header] + rows) + "\n")
+    return str(path)
+
+
+def ids(cursor):
+    return [p["id"] for p in cursor.arrivals_at(float("inf"))]
+
+
+def test_missing_column(tmp_path):
+    path = write_csv(tmp_path, ["A,0,3"], header="id,arrival,priority")
+    with pytest.raises(ValueError, match=r"jobs\.csv:1: missing column\(s\) burst"):
+        list(read_trace(path))
+
+
+@pytest.mark.parametrize("row, message", [
+    ("B,x,3,1", "jobs.csv:3: arrival must be an integer, got 'x'"),
+    ("B,1,2.5,1", "jobs.csv:3: burst must be an integer, got '2.5'"),
+    ("B,1,0,1", "jobs.csv:3: burst must be >= 1, got 0"),
+    ("B,1,3,5", r"jobs.csv:3: priority must be one of \(1, 2, 3, 4\), got 5"),
+    ("B,-1,3,1", "jobs.csv:3: arrival must be >= 0, got -1"),
+    (",1,3,1", "jobs.csv:3: missing id"),
+    ("B,1,3", "jobs.csv:3: expected 4 fields, got 3"),
+])
+def test_invalid_csv_rows_name_their_line(tmp_path, row, message):
+    path = write_csv(tmp_path, ["A,0,3,1", row])
+    with pytest.raises(ValueError, match=message):
+        list(read_trace(path))
+
+
+@pytest.mark.parametrize("record, message", [
+    ({"id": "A", "arrival": 0, "burst": 1.5, "priority": 1}, "burst must be an integer, got 1.5"),
+    ({"id": "A", "arrival": True, "burst": 1, "priority": 1}, "arrival must be an integer, got True"),
+    ({"id": "A", "arrival": 0, "burst": 1}, "missing priority"),
+])
+def test_invalid_jsonl_records(tmp_path, record, message):
+    path = tmp_path / "jobs.jsonl"
+    path.write_text(json.dumps(record) + "\n")
+    with pytest.raises(ValueError, match=f"jobs.jsonl:1: {message}"):
+        list(read_trace(str(path)))
+
+
+def test_unsorted_trace(tmp_path):
+    path = write_csv(tmp_path, ["A,5,3,1", "B,2,3,1"])
+    with pytest.raises(ValueError, match="not sorted by arrival: B arrives at 2 after A at 5"):
+        list(read_trace(path))
+    assert [p["id"] for p in read_trace(path, require_sorted=False)] == ["A", "B"]
+
+
+def test_duplicate_ids(tmp_path):
+    path = write_csv(tmp_path, ["A,0,3,1", "B,1,3,1", "A,2,3,1"])
+    with pytest.raises(ValueError, match="duplicate process id 'A'"):
+        list(read_trace(path, require_sorted=False))
+    with pytest.raises(ValueError, match="duplicate process id 'A'"):
+        build_cache(path)
+    assert os.listdir(tmp_path) == ["jobs.csv"]
+
+
+def test_build_cache_sorts_stably(tmp_path):
+    path = write_csv(tmp_path, ["A,5,3,1", "B,2,4,2", "C,5,1,3", "D,2,2,4", "E,0,9,1"])
+    table = load_cache(build_cache(path))
+    assert table["id"].tolist() == ["E", "B", "D", "A", "C"]
+    assert table["arrival"].tolist() == [0, 2, 2, 5, 5]
+    assert table["burst"].tolist() == [9, 4, 2, 3, 1]
+    assert table["priority"].tolist() == [1, 2, 4, 1, 3]
+
+
+def test_open_trace_rebuilds_a_stale_cache(tmp_path):
+    path = write_csv(tmp_path, ["A,0,3,1"])
+    assert ids(open_trace(path, cache=True)) == ["A"]
+    cache_path = path + ".npy"
+    built = os.path.getmtime(cache_path)
+
+    # An older trace keeps the cache
+    os.utime(path, (built - 10, built - 10))
+    assert ids(open_trace(path, cache=True)) == ["A"]
+    assert os.path.getmtime(cache_path) == built
+
+    write_csv(tmp_path, ["B,0,3,1", "C,1,3,1"])
+    os.utime(path, (built + 10, built + 10))
+    assert ids(open_trace(path, cache=True)) == ["B", "C"]